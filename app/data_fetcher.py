@@ -1,15 +1,83 @@
 import pandas as pd
 from datetime import datetime, timedelta
 import asyncio
-import json
+import csv
+import gzip
+import hashlib
+import io
+import orjson
+import re
 import os
+import time
+from collections import deque
 from typing import List, Dict, Any, Optional, Tuple
 import logging
 from aiohttp import ClientSession, ClientTimeout
-from bs4 import BeautifulSoup
+import lxml.html
 
 logger = logging.getLogger(__name__)
 
+# ClientTimeout is a frozen dataclass, so one instance per duration can be
+# shared across every request instead of being rebuilt in each call
+_TIMEOUT_30 = ClientTimeout(total=30)
+_TIMEOUT_45 = ClientTimeout(total=45)
+_TIMEOUT_60 = ClientTimeout(total=60)
+_TIMEOUT_120 = ClientTimeout(total=120)
+
+# Alpha Vantage OVERVIEW fast path: the payload carries ~50 fields but only
+# MarketCapitalization matters here, so a compiled regex over the raw bytes
+# skips the full JSON decode in the common case
+_AV_MC_RE = re.compile(rb'"MarketCapitalization"\s*:\s*"(\d+)"')
+
+# Yahoo quote page fallback: the first pattern runs over the raw bytes so a
+# hit never pays for decoding ~500KB of HTML; the rest are precompiled once
+# instead of being rebuilt and recompiled on every scrape
+_YH_MC_FAST_RE = re.compile(rb'data-test="MARKET_CAP-value"[^>]*>([^<]+)<')
+_MC_MULTIPLIERS = {'T': 1e12, 'B': 1e9, 'M': 1e6, 'K': 1e3}
+
+# Record schema shared by every provider path and the merge step
+_REQUIRED_COLS = ('date', 'symbol', 'price', 'market_cap', 'volume')
+_YH_MC_PATTERNS = [
+    re.compile(p, re.IGNORECASE) for p in (
+        r'"marketCap":\s*{\s*"raw":\s*([0-9.]+)',
+        r'"marketCap":\s*([0-9.]+)',
+        r'Market Cap[^>]*>([0-9.]+[BT]?)',
+        r'marketCap.*?([0-9]+\.?[0-9]*[BT]?)',
+        r'Market\s*Cap.*?(\d{1,3}(?:,\d{3})*(?:\.\d+)?[BT]?)',
+        r'data-reactid.*?Market Cap.*?(\d+\.?\d*[BT]?)',
+        r'marketCapitalization.*?([0-9.]+)',
+    )
+]
+
+
+class _TokenBucket:
+    """Sliding-window rate limiter shared by every in-flight request.
+
+    Tracks grant times on the monotonic clock; acquire() sleeps until the
+    oldest grant in the window expires, so the limit holds globally across
+    concurrent tasks instead of each call sleeping a fixed delay.
+    """
+
+    def __init__(self, max_rate: int, time_period: float):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._grants = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            while self._grants and now - self._grants[0] >= self.time_period:
+                self._grants.popleft()
+            if len(self._grants) >= self.max_rate:
+                wait = self.time_period - (now - self._grants[0])
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+                while self._grants and now - self._grants[0] >= self.time_period:
+                    self._grants.popleft()
+            self._grants.append(time.monotonic())
+
+
 class DataFetcher:
     def __init__(self, alpha_vantage_api_key: str = None):
         """Initialize data fetcher with Alpha Vantage API key."""
@@ -21,6 +89,7 @@ class DataFetcher:
         self.cache_dir = 'data'
         self.universe_cache_file = f'{self.cache_dir}/universe_cache.json'
         self.market_cap_cache_file = f'{self.cache_dir}/market_cap_cache.json'
+        self.daily_cache_dir = f'{self.cache_dir}/daily'
         self.cache_duration = timedelta(days=7)
         
         # Rate limiting and batch settings
@@ -31,12 +100,42 @@ class DataFetcher:
         self.candidate_symbols = 200  # Pool of companies to evaluate for market cap
         self.max_symbols = 100  # Final number of top companies by market cap
         
-        # Ensure cache directory exists
+        # Ensure cache directories exist
         os.makedirs(self.cache_dir, exist_ok=True)
+        os.makedirs(self.daily_cache_dir, exist_ok=True)
         
+        # Global Alpha Vantage limiter shared by all concurrent tasks, so
+        # the free-tier budget is enforced across the run instead of via a
+        # fixed sleep inside every call
+        self._av_limiter = _TokenBucket(self._av_rate(self.rate_limit_delay), 60.0)
+
+        # Shared HTTP session, created lazily on the running loop
+        self._session: Optional[ClientSession] = None
+
         # Load cached data
         self.universe_cache = self._load_cache(self.universe_cache_file)
         self.market_cap_cache = self._load_cache(self.market_cap_cache_file)
+        self._mcap_dirty = False
+        self._cache_hash = {}
+
+        # Snapshot of cache sizes, refreshed on writes so status endpoints
+        # don't re-measure the dicts per request
+        self._cache_size_snapshot = {
+            'universe_cache_size': len(self.universe_cache),
+            'market_cap_cache_size': len(self.market_cap_cache)
+        }
+
+    @staticmethod
+    def _av_rate(delay: float) -> int:
+        """Per-minute request budget for a configured inter-request delay.
+
+        A zero or negative delay was a valid baseline setting (sleep(0),
+        i.e. effectively unthrottled) and must not divide by zero; it maps
+        to the most generous budget, one request per second.
+        """
+        if delay <= 0:
+            return 60
+        return max(1, round(60 / delay))
 
     def configure_settings(self, max_symbols: int = None, candidate_symbols: int = None, batch_size: int = None, rate_limit_delay: int = None):
         """Configure data fetcher settings."""
@@ -54,6 +153,7 @@ class DataFetcher:
             
         if rate_limit_delay is not None:
             self.rate_limit_delay = rate_limit_delay
+            self._av_limiter = _TokenBucket(self._av_rate(rate_limit_delay), 60.0)
             logger.info(f"Updated rate_limit_delay to {rate_limit_delay}s")
     
     def get_current_settings(self) -> Dict[str, Any]:
@@ -67,12 +167,64 @@ class DataFetcher:
             'cache_duration_days': self.cache_duration.days
         }
 
+    async def _get_session(self) -> ClientSession:
+        """Return the shared HTTP session, creating it on first use.
+
+        One pooled session for the fetcher's lifetime keeps connections
+        warm across calls; the default connector's 15s keepalive drops
+        pooled sockets between rate-limited requests, forcing a fresh
+        TLS handshake almost every call.
+        """
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=30,
+                    limit_per_host=10,
+                    keepalive_timeout=75,
+                    enable_cleanup_closed=True,
+                    ttl_dns_cache=300
+                ),
+                timeout=_TIMEOUT_60,
+                # Advertising gzip shrinks the ~1-2MB daily series payloads
+                # several-fold; aiohttp decompresses transparently
+                headers={
+                    'Accept-Encoding': 'gzip, deflate',
+                    'Connection': 'keep-alive',
+                    'User-Agent': 'stockIndex/1.0'
+                }
+            )
+        return self._session
+
+    def flush_market_cap_cache(self):
+        """Write the market cap cache to disk once if any entry changed.
+
+        get_market_cap only marks the dict dirty, so a 100-symbol run does
+        one serialization here instead of rewriting the whole file per
+        symbol.
+        """
+        if self._mcap_dirty:
+            self._save_cache(self.market_cap_cache_file, self.market_cap_cache)
+            self._mcap_dirty = False
+
+    async def close(self):
+        """Flush pending cache writes and close the shared HTTP session."""
+        await asyncio.to_thread(self.flush_market_cap_cache)
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
     def _load_cache(self, cache_file: str) -> Dict:
         """Load cached data from file."""
         try:
             if os.path.exists(cache_file):
-                with open(cache_file, 'r') as f:
-                    cache = json.load(f)
+                with open(cache_file, 'rb') as f:
+                    cache = orjson.loads(f.read())
                     if cache.get('timestamp'):
                         cache_time = datetime.fromisoformat(cache['timestamp'])
                         if datetime.now() - cache_time < self.cache_duration:
@@ -85,12 +237,27 @@ class DataFetcher:
     def _save_cache(self, cache_file: str, data: Dict):
         """Save data to cache file."""
         try:
+            # Skip the write entirely when the content is identical to the
+            # last save; the hash covers the data, not the timestamp wrapper
+            digest = hashlib.blake2b(orjson.dumps(data), digest_size=8).digest()
+            if self._cache_hash.get(cache_file) == digest:
+                return
+
             cache = {
                 'timestamp': datetime.now().isoformat(),
                 'data': data
             }
-            with open(cache_file, 'w') as f:
-                json.dump(cache, f)
+            # Atomic write: a crash mid-dump must not leave a torn file
+            tmp_file = cache_file + '.tmp'
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(cache))
+            os.replace(tmp_file, cache_file)
+            self._cache_hash[cache_file] = digest
+
+            if cache_file == self.universe_cache_file:
+                self._cache_size_snapshot['universe_cache_size'] = len(data)
+            elif cache_file == self.market_cap_cache_file:
+                self._cache_size_snapshot['market_cap_cache_size'] = len(data)
         except Exception as e:
             logger.error(f"Error saving cache {cache_file}: {str(e)}")
 
@@ -112,7 +279,7 @@ class DataFetcher:
                 'sec-ch-ua-platform': '"Windows"'
             }
             
-            async with session.get(url, headers=headers, params=params, timeout=ClientTimeout(total=30)) as response:
+            async with session.get(url, headers=headers, params=params, timeout=_TIMEOUT_30) as response:
                 if response.status == 429:
                     logger.warning(f"Polygon.io rate limited for {symbol}")
                     await asyncio.sleep(10)
@@ -128,8 +295,8 @@ class DataFetcher:
                     return []
                 
                 results = data['results']
-                start = datetime.strptime(start_date, "%Y-%m-%d")
-                end = datetime.strptime(end_date, "%Y-%m-%d")
+                start = datetime.fromisoformat(start_date)
+                end = datetime.fromisoformat(end_date)
                 
                 result = []
                 for entry in results:
@@ -179,7 +346,7 @@ class DataFetcher:
                 'sec-ch-ua-platform': '"Windows"'
             }
             
-            async with session.get(url, headers=headers, params=params, timeout=ClientTimeout(total=30)) as response:
+            async with session.get(url, headers=headers, params=params, timeout=_TIMEOUT_30) as response:
                 if response.status != 200:
                     logger.warning(f"IEX Cloud HTTP {response.status} for {symbol}")
                     return []
@@ -190,14 +357,14 @@ class DataFetcher:
                     logger.warning(f"No data from IEX Cloud for {symbol}")
                     return []
                 
-                start = datetime.strptime(start_date, "%Y-%m-%d")
-                end = datetime.strptime(end_date, "%Y-%m-%d")
+                start = datetime.fromisoformat(start_date)
+                end = datetime.fromisoformat(end_date)
                 
                 result = []
                 for entry in data:
                     try:
                         date_str = entry['date']
-                        date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+                        date_obj = datetime.fromisoformat(date_str)
                         
                         if start <= date_obj <= end and entry.get('close'):
                             result.append({
@@ -243,7 +410,7 @@ class DataFetcher:
             for endpoint in endpoints:
                 try:
                     await asyncio.sleep(1)
-                    async with session.get(endpoint, headers=headers, timeout=ClientTimeout(total=30)) as response:
+                    async with session.get(endpoint, headers=headers, timeout=_TIMEOUT_30) as response:
                         if response.status == 200:
                             data = await response.json()
                             
@@ -255,8 +422,8 @@ class DataFetcher:
                                 historical_data = data
                             
                             if historical_data:
-                                start = datetime.strptime(start_date, "%Y-%m-%d")
-                                end = datetime.strptime(end_date, "%Y-%m-%d")
+                                start = datetime.fromisoformat(start_date)
+                                end = datetime.fromisoformat(end_date)
                                 
                                 result = []
                                 for entry in historical_data:
@@ -266,7 +433,7 @@ class DataFetcher:
                                         volume = entry.get('volume') or entry.get('Volume', 0)
                                         
                                         if date_str and close_price:
-                                            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+                                            date_obj = datetime.fromisoformat(date_str)
                                             
                                             if start <= date_obj <= end:
                                                 result.append({
@@ -338,7 +505,7 @@ class DataFetcher:
                     await asyncio.sleep(1)  # Small delay between attempts
                     logger.info(f"Trying crumb method: {method_info['name']}")
                     
-                    async with session.get(method_info["url"], headers=headers, timeout=ClientTimeout(total=30)) as response:
+                    async with session.get(method_info["url"], headers=headers, timeout=_TIMEOUT_30) as response:
                         logger.info(f"Crumb method {method_info['name']} response: {response.status}")
                         
                         if response.status == 200:
@@ -360,7 +527,6 @@ class DataFetcher:
                                 logger.info(f"HTML length from {method_info['name']}: {len(html)}")
                                 
                                 # Enhanced crumb patterns
-                                import re
                                 crumb_patterns = [
                                     r'"crumb":"([^"]+)"',
                                     r'"CrumbStore"\s*:\s*\{\s*"crumb"\s*:\s*"([^"]+)"',
@@ -407,14 +573,26 @@ class DataFetcher:
             logger.error(f"Error getting Yahoo Finance crumb: {e}")
             return None
 
-    async def _get_market_cap_yahoo(self, symbol: str, session: ClientSession) -> Optional[float]:
+    async def _get_market_cap_yahoo(self, symbol: str, session: ClientSession = None) -> Optional[float]:
         """Get market cap from Yahoo Finance using multiple approaches."""
+        if session is None:
+            session = await self._get_session()
+
         try:
             # First try to get a crumb for authenticated API access
             crumb = await self._get_yahoo_crumb(session)
             
             # Try different Yahoo Finance approaches - start with crumb-free methods
             api_approaches = [
+                # Approach 0: batch quote API - a few KB of JSON carrying
+                # marketCap directly, vs the ~500KB quote page
+                {
+                    "name": "quote_API_no_crumb",
+                    "url": "https://query1.finance.yahoo.com/v7/finance/quote",
+                    "params": {"symbols": symbol, "fields": "marketCap"},
+                    "type": "json",
+                    "requires_crumb": False
+                },
                 # Approach 1: Chart API without crumb (often works)
                 {
                     "name": "chart_API_no_crumb",
@@ -486,7 +664,7 @@ class DataFetcher:
                     
                     logger.info(f"Trying Yahoo Finance market cap approach: {approach['name']} for {symbol}")
                     
-                    async with session.get(approach["url"], headers=headers, params=approach["params"], timeout=ClientTimeout(total=30)) as response:
+                    async with session.get(approach["url"], headers=headers, params=approach["params"], timeout=_TIMEOUT_30) as response:
                         logger.info(f"Yahoo Finance {approach['name']} response status: {response.status} for {symbol}")
                         
                         if response.status == 401:
@@ -562,6 +740,16 @@ class DataFetcher:
                                                 logger.info(f"Yahoo Finance {approach['name']} market cap for {symbol}: ${market_cap:,.0f} from chart meta")
                                                 return market_cap
                             
+                            # Handle batch quote response
+                            elif 'quoteResponse' in data:
+                                quote_result = data['quoteResponse'].get('result', [])
+                                if quote_result:
+                                    mc = quote_result[0].get('marketCap')
+                                    if mc:
+                                        market_cap = float(mc)
+                                        logger.info(f"Yahoo Finance {approach['name']} market cap for {symbol}: ${market_cap:,.0f} from quote API")
+                                        return market_cap
+                            
                             # Handle search response
                             elif 'quotes' in data:
                                 quotes = data.get('quotes', [])
@@ -582,54 +770,46 @@ class DataFetcher:
                             # If JSON parsing failed, try HTML scraping as final fallback
                             if approach['url'] and 'quote' in approach['url']:
                                 try:
-                                    import re
                                     logger.info(f"Attempting HTML scraping fallback for {symbol}")
                                     
-                                    # Try to extract market cap from HTML content
-                                    html_content = await response.text()
-                                    
-                                    # Multiple regex patterns to find market cap
-                                    patterns = [
-                                        r'"marketCap":\s*{\s*"raw":\s*([0-9.]+)',
-                                        r'"marketCap":\s*([0-9.]+)',
-                                        r'Market Cap[^>]*>([0-9.]+[BT]?)',
-                                        r'marketCap.*?([0-9]+\.?[0-9]*[BT]?)',
-                                        r'Market\s*Cap.*?(\d{1,3}(?:,\d{3})*(?:\.\d+)?[BT]?)',
-                                        r'data-reactid.*?Market Cap.*?(\d+\.?\d*[BT]?)',
-                                        r'marketCapitalization.*?([0-9.]+)',
-                                    ]
+                                    html_bytes = await response.read()
+
+                                    # Bytes fast path: the quote table cell, checked
+                                    # before decoding the page to text
+                                    fast_match = _YH_MC_FAST_RE.search(html_bytes)
+                                    if fast_match:
+                                        candidates = [fast_match.group(1).decode('utf-8', 'replace').strip()]
+                                    else:
+                                        html_content = html_bytes.decode('utf-8', 'replace')
+                                        candidates = []
+                                        for pattern in _YH_MC_PATTERNS:
+                                            match = pattern.search(html_content)
+                                            if match:
+                                                candidates.append(match.group(1))
                                     
-                                    for pattern in patterns:
-                                        match = re.search(pattern, html_content, re.IGNORECASE)
-                                        if match:
-                                            value_str = match.group(1)
-                                            logger.info(f"Found market cap pattern '{pattern}' with value '{value_str}' for {symbol}")
+                                    for value_str in candidates:
+                                        logger.info(f"Found market cap candidate '{value_str}' for {symbol}")
                                             
-                                            try:
-                                                # Handle different formats
-                                                if 'T' in value_str.upper():
-                                                    # Trillion
-                                                    market_cap = float(value_str.upper().replace('T', '').replace(',', '')) * 1e12
-                                                elif 'B' in value_str.upper():
-                                                    # Billion
-                                                    market_cap = float(value_str.upper().replace('B', '').replace(',', '')) * 1e9
-                                                elif ',' in value_str:
-                                                    # Raw number with commas
-                                                    market_cap = float(value_str.replace(',', ''))
-                                                else:
-                                                    # Raw number
-                                                    market_cap = float(value_str)
+                                        try:
+                                            # One float() plus a suffix lookup
+                                            # handles "1.23T", "456B", "789,000"
+                                            # and plain numbers alike
+                                            normalized = value_str.upper().replace(',', '')
+                                            if normalized and normalized[-1] in _MC_MULTIPLIERS:
+                                                market_cap = float(normalized[:-1]) * _MC_MULTIPLIERS[normalized[-1]]
+                                            else:
+                                                market_cap = float(normalized)
                                                 
-                                                # Validate reasonable market cap (> $1M and < $50T)
-                                                if 1_000_000 <= market_cap <= 50_000_000_000_000:
-                                                    logger.info(f"Yahoo Finance HTML scraping market cap for {symbol}: ${market_cap:,.0f}")
-                                                    return market_cap
-                                                else:
-                                                    logger.warning(f"Unrealistic market cap from HTML scraping: {market_cap} for {symbol}")
+                                            # Validate reasonable market cap (> $1M and < $50T)
+                                            if 1_000_000 <= market_cap <= 50_000_000_000_000:
+                                                logger.info(f"Yahoo Finance HTML scraping market cap for {symbol}: ${market_cap:,.0f}")
+                                                return market_cap
+                                            else:
+                                                logger.warning(f"Unrealistic market cap from HTML scraping: {market_cap} for {symbol}")
                                                     
-                                            except ValueError as ve:
-                                                logger.warning(f"Could not parse market cap value '{value_str}' for {symbol}: {ve}")
-                                                continue
+                                        except ValueError as ve:
+                                            logger.warning(f"Could not parse market cap value '{value_str}' for {symbol}: {ve}")
+                                            continue
                                     
                                     logger.info(f"No market cap found in HTML content for {symbol}")
                                     
@@ -658,10 +838,20 @@ class DataFetcher:
                 "apikey": self.alpha_vantage_api_key
             }
             
+            # Draw from the shared Alpha Vantage budget; only actual HTTP
+            # calls pay, never cache hits
+            await self._av_limiter.acquire()
             async with session.get("https://www.alphavantage.co/query", params=params) as response:
-                data = await response.json()
-                
-                # Check for rate limit
+                raw = await response.read()
+
+                match = _AV_MC_RE.search(raw)
+                if match:
+                    market_cap = float(match.group(1))
+                    logger.info(f"Alpha Vantage market cap for {symbol}: ${market_cap:,.0f}")
+                    return market_cap
+
+                # Regex missed: decode fully to inspect rate-limit messages
+                data = orjson.loads(raw)
                 if "Note" in data and "call frequency" in data["Note"].lower():
                     logger.warning(f"Alpha Vantage rate limit hit for {symbol}")
                     return None
@@ -678,8 +868,8 @@ class DataFetcher:
     async def _get_daily_data_yahoo(self, symbol: str, start_date: str, end_date: str, session: ClientSession) -> List[Dict[str, Any]]:
         """Get daily stock data from Yahoo Finance using API endpoints."""
         try:
-            start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
+            start = datetime.fromisoformat(start_date)
+            end = datetime.fromisoformat(end_date)
             
             start_timestamp = int(start.timestamp())
             end_timestamp = int(end.timestamp())
@@ -725,7 +915,7 @@ class DataFetcher:
                             'includeAdjustedClose': 'true'
                         }
                     
-                    async with session.get(url, headers=headers, params=params, timeout=ClientTimeout(total=45)) as response:
+                    async with session.get(url, headers=headers, params=params, timeout=_TIMEOUT_45) as response:
                         logger.info(f"Yahoo Finance stock data response status: {response.status} for {symbol}")
                         
                         if response.status == 401:
@@ -820,7 +1010,7 @@ class DataFetcher:
                                     close_price = float(values[4])
                                     volume = int(float(values[6])) if len(values) > 6 and values[6] not in ['null', ''] else 0
                                     
-                                    date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+                                    date_obj = datetime.fromisoformat(date_str)
                                     if start <= date_obj <= end:
                                         result.append({
                                             "date": date_str,
@@ -851,13 +1041,20 @@ class DataFetcher:
             logger.error(f"Error in Yahoo Finance API fallback for {symbol}: {str(e)}")
         return []
 
-    async def get_market_cap(self, symbol: str, session: ClientSession) -> Optional[float]:
+    async def get_market_cap(self, symbol: str, session: ClientSession = None) -> Optional[float]:
         """Get market cap with fallback logic: Alpha Vantage -> Yahoo Finance."""
-        # Check cache first
+        if session is None:
+            session = await self._get_session()
+
+        # Check cache first; entries carry a precomputed epoch expiry so
+        # validity is one float compare (legacy ISO-timestamp entries are
+        # upgraded on read)
         if symbol in self.market_cap_cache:
             cache_entry = self.market_cap_cache[symbol]
-            cache_time = datetime.fromisoformat(cache_entry['timestamp'])
-            if datetime.now() - cache_time < timedelta(hours=24):
+            expires_at = cache_entry.get('expires_at')
+            if expires_at is None and cache_entry.get('timestamp'):
+                expires_at = datetime.fromisoformat(cache_entry['timestamp']).timestamp() + 24 * 3600
+            if expires_at and time.time() < expires_at:
                 return cache_entry['market_cap']
         
         # Try Alpha Vantage first
@@ -868,21 +1065,107 @@ class DataFetcher:
             await asyncio.sleep(2)
             market_cap = await self._get_market_cap_yahoo(symbol, session)
         
-        # Cache result if successful
+        # Cache result if successful; the write is coalesced into one
+        # flush_market_cap_cache call at the end of the run
         if market_cap:
             self.market_cap_cache[symbol] = {
                 'market_cap': market_cap,
-                'timestamp': datetime.now().isoformat()
+                'expires_at': time.time() + 24 * 3600
             }
-            self._save_cache(self.market_cap_cache_file, self.market_cap_cache)
+            self._mcap_dirty = True
         
         return market_cap
 
-    async def get_daily_data(self, symbol: str, start_date: str, end_date: str, session: ClientSession) -> List[Dict[str, Any]]:
+    def _daily_cache_path(self, symbol: str) -> str:
+        return f'{self.daily_cache_dir}/{symbol}.parquet'
+
+    def _load_daily_frame(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Load the cached full daily frame if it was written today.
+
+        The cache holds the complete unfiltered series, so any
+        start_date/end_date combination hits the same file. Historical
+        closes never change; only today's session goes stale, hence the
+        written-today check.
+        """
+        path = self._daily_cache_path(symbol)
+        try:
+            if os.path.exists(path):
+                mtime = datetime.fromtimestamp(os.path.getmtime(path))
+                if mtime.date() == datetime.now().date():
+                    import pyarrow.parquet as pq
+                    return pq.read_table(path).to_pandas()
+        except Exception as e:
+            logger.debug(f"Error loading daily cache for {symbol}: {e}")
+        return None
+
+    def _save_daily_frame(self, symbol: str, df: pd.DataFrame):
+        """Persist the full typed daily frame as zstd Parquet.
+
+        Typed columnar storage reloads without re-parsing JSON strings,
+        and float32 prices halve the on-disk footprint versus FP64.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            pq.write_table(
+                pa.Table.from_pandas(df, preserve_index=False),
+                self._daily_cache_path(symbol),
+                compression='zstd'
+            )
+        except Exception as e:
+            logger.debug(f"Error saving daily cache for {symbol}: {e}")
+
+    @staticmethod
+    def _series_to_frame(daily_data: Dict[str, Any]) -> Optional[pd.DataFrame]:
+        """Parse a full Alpha Vantage daily series into a typed frame.
+
+        Vectorized: one coerce pass per column replaces ~6000 per-row
+        float()/int() casts; malformed rows drop in bulk, mirroring the
+        old per-row try/except skip.
+        """
+        df = pd.DataFrame.from_dict(daily_data, orient='index')
+        if df.empty or '4. close' not in df.columns or '6. volume' not in df.columns:
+            return None
+
+        df = df[['4. close', '6. volume']].rename(
+            columns={'4. close': 'price', '6. volume': 'volume'}
+        )
+        df['price'] = pd.to_numeric(df['price'], errors='coerce')
+        df['volume'] = pd.to_numeric(df['volume'], errors='coerce')
+        df = df.dropna()
+        df['price'] = df['price'].astype('float32')
+        df['volume'] = df['volume'].astype('int64')
+        df.index.name = 'date'
+        return df.reset_index()
+
+    @staticmethod
+    def _frame_to_records(symbol: str, df: pd.DataFrame, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Filter a full daily frame down to record dicts in range."""
+        dates = pd.to_datetime(df['date'], format='%Y-%m-%d', errors='coerce', cache=True)
+        mask = dates.notna() & (dates >= start_date) & (dates <= end_date)
+        out = df.loc[mask].copy()
+        out['price'] = out['price'].astype('float64')
+        out['symbol'] = symbol
+        out['market_cap'] = 0
+        return out.to_dict('records')
+
+    async def get_daily_data(self, symbol: str, start_date: str, end_date: str, session: ClientSession = None) -> List[Dict[str, Any]]:
         """Get daily stock data with multi-tier fallback logic: Alpha Vantage -> Yahoo Finance -> FMP."""
+        if session is None:
+            session = await self._get_session()
+
+        # Warm rerun: serve from the on-disk series cache, skipping both
+        # the rate-limit token and the HTTP round-trip
+        cached_frame = await asyncio.to_thread(self._load_daily_frame, symbol)
+        if cached_frame is not None:
+            result = self._frame_to_records(symbol, cached_frame, start_date, end_date)
+            if result:
+                logger.info(f"Daily cache hit for {symbol}: {len(result)} data points")
+                return result
+
         try:
             # Only apply Alpha Vantage rate limiting if we actually use Alpha Vantage
-            await asyncio.sleep(self.rate_limit_delay)
+            await self._av_limiter.acquire()
             
             params = {
                 "function": "TIME_SERIES_DAILY_ADJUSTED",
@@ -892,29 +1175,16 @@ class DataFetcher:
             }
             
             async with session.get("https://www.alphavantage.co/query", params=params) as response:
-                data = await response.json()
+                data = await response.json(loads=orjson.loads)
                 
                 # Check for successful Alpha Vantage response
                 if "Time Series (Daily)" in data:
-                    daily_data = data["Time Series (Daily)"]
-                    start = datetime.strptime(start_date, "%Y-%m-%d")
-                    end = datetime.strptime(end_date, "%Y-%m-%d")
-                    
+                    frame = self._series_to_frame(data["Time Series (Daily)"])
                     result = []
-                    for date_str, values in daily_data.items():
-                        date = datetime.strptime(date_str, "%Y-%m-%d")
-                        if start <= date <= end:
-                            try:
-                                result.append({
-                                    "date": date_str,
-                                    "symbol": symbol,
-                                    "price": float(values["4. close"]),
-                                    "volume": int(values["6. volume"]),
-                                    "market_cap": 0
-                                })
-                            except (ValueError, KeyError):
-                                continue
-                    
+                    if frame is not None:
+                        await asyncio.to_thread(self._save_daily_frame, symbol, frame)
+                        result = self._frame_to_records(symbol, frame, start_date, end_date)
+
                     if result:
                         logger.info(f"Alpha Vantage fetched {len(result)} data points for {symbol}")
                         return result
@@ -1043,7 +1313,7 @@ class DataFetcher:
                 'final_pool_size': self.max_symbols
             }
         }
-        self._save_cache(self.universe_cache_file, self.universe_cache)
+        await asyncio.to_thread(self._save_cache, self.universe_cache_file, self.universe_cache)
         
         logger.info(f"Two-stage selection complete: Selected top {len(top_symbols)} companies by market cap from {len(candidate_symbols)} candidates")
         return top_symbols
@@ -1053,11 +1323,31 @@ class DataFetcher:
         try:
             logger.info(f"Fetching ALL S&P 500 companies to evaluate real market caps...")
             sp500_url = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
-            tables = pd.read_html(sp500_url)
-            
-            # The first table contains the S&P 500 companies
-            df = tables[0]
-            all_symbols = df['Symbol'].tolist()
+            session = await self._get_session()
+
+            # Fetch on the shared session (pd.read_html downloads
+            # synchronously, blocking the event loop) and pull just the
+            # ticker column with one XPath pass instead of building a
+            # DataFrame for every table on the page
+            all_symbols = []
+            try:
+                async with session.get(sp500_url) as response:
+                    html = await response.text()
+                doc = lxml.html.fromstring(html)
+                all_symbols = [
+                    sym.strip()
+                    for sym in doc.xpath(
+                        '//table[contains(@class,"wikitable")][1]//tr/td[1]/a/text()'
+                    )
+                    if sym.strip()
+                ]
+            except Exception as e:
+                logger.warning(f"Wikipedia S&P 500 fetch failed: {str(e)}")
+
+            if not all_symbols:
+                # Second source: one LISTING_STATUS CSV instead of giving up
+                # straight to the hardcoded list
+                all_symbols = await self._get_listing_status_symbols()
             
             logger.info(f"Found {len(all_symbols)} S&P 500 companies. Evaluating ALL {len(all_symbols)} companies by real market cap...")
             
@@ -1067,36 +1357,35 @@ class DataFetcher:
             
             # Process all symbols in smaller batches to get market cap data
             batch_size = 10  # Moderate batch size for market cap evaluation
-            timeout = ClientTimeout(total=120)
-            
-            async with ClientSession(timeout=timeout) as session:
-                for batch_start in range(0, len(all_symbols), batch_size):
-                    batch_end = min(batch_start + batch_size, len(all_symbols))
-                    batch_symbols = all_symbols[batch_start:batch_end]
-                    
-                    logger.info(f"Evaluating market cap for S&P 500 batch {batch_start//batch_size + 1}/{(len(all_symbols) + batch_size - 1)//batch_size}: {batch_symbols}")
-                    
-                    # Get market cap for each symbol in the batch
-                    batch_tasks = []
-                    for symbol in batch_symbols:
-                        task = self._get_symbol_market_cap(symbol, session)
-                        batch_tasks.append(task)
-                    
-                    # Wait for all tasks in the batch to complete
-                    batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                    
-                    for symbol, result in zip(batch_symbols, batch_results):
-                        if isinstance(result, Exception):
-                            logger.warning(f"Error getting market cap for {symbol}: {result}")
-                            failed_symbols.append(symbol)
-                        elif result is not None:
-                            market_cap_data.append({'symbol': symbol, 'market_cap': result})
-                        else:
-                            failed_symbols.append(symbol)
-                    
-                    # Rate limiting between batches
-                    await asyncio.sleep(self.yahoo_batch_delay)
-            
+
+            session = await self._get_session()
+            for batch_start in range(0, len(all_symbols), batch_size):
+                batch_end = min(batch_start + batch_size, len(all_symbols))
+                batch_symbols = all_symbols[batch_start:batch_end]
+
+                logger.info(f"Evaluating market cap for S&P 500 batch {batch_start//batch_size + 1}/{(len(all_symbols) + batch_size - 1)//batch_size}: {batch_symbols}")
+
+                # Get market cap for each symbol in the batch
+                batch_tasks = []
+                for symbol in batch_symbols:
+                    task = self._get_symbol_market_cap(symbol, session)
+                    batch_tasks.append(task)
+
+                # Wait for all tasks in the batch to complete
+                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+
+                for symbol, result in zip(batch_symbols, batch_results):
+                    if isinstance(result, Exception):
+                        logger.warning(f"Error getting market cap for {symbol}: {result}")
+                        failed_symbols.append(symbol)
+                    elif result is not None:
+                        market_cap_data.append({'symbol': symbol, 'market_cap': result})
+                    else:
+                        failed_symbols.append(symbol)
+
+                # Rate limiting between batches
+                await asyncio.sleep(self.yahoo_batch_delay)
+
             # Sort by market cap and return ALL evaluated companies (will be trimmed later)
             if market_cap_data:
                 market_cap_data.sort(key=lambda x: x['market_cap'], reverse=True)
@@ -1145,6 +1434,48 @@ class DataFetcher:
             logger.debug(f"Error getting market cap for {symbol}: {str(e)}")
             return None
     
+    async def _get_listing_status_symbols(self) -> List[str]:
+        """Universe fallback: one Alpha Vantage LISTING_STATUS CSV call.
+
+        Used when the Wikipedia constituents page is unreachable. The CSV
+        covers every active listing in a single request, so it is filtered
+        to NYSE/NASDAQ common stock, trimmed to the candidate pool size,
+        and cached on disk alongside the other universe caches.
+        """
+        cache_path = f'{self.cache_dir}/listing_status.csv.gz'
+        text = None
+        try:
+            if os.path.exists(cache_path):
+                mtime = datetime.fromtimestamp(os.path.getmtime(cache_path))
+                if datetime.now() - mtime < self.cache_duration:
+                    with gzip.open(cache_path, 'rt') as f:
+                        text = f.read()
+        except Exception as e:
+            logger.debug(f"Error loading listing status cache: {e}")
+
+        if text is None:
+            session = await self._get_session()
+            await self._av_limiter.acquire()
+            params = {
+                "function": "LISTING_STATUS",
+                "apikey": self.alpha_vantage_api_key
+            }
+            async with session.get("https://www.alphavantage.co/query", params=params) as response:
+                text = await response.text()
+            try:
+                with gzip.open(cache_path, 'wt') as f:
+                    f.write(text)
+            except Exception as e:
+                logger.debug(f"Error saving listing status cache: {e}")
+
+        symbols = [
+            row['symbol']
+            for row in csv.DictReader(io.StringIO(text))
+            if row.get('exchange') in ('NYSE', 'NASDAQ') and row.get('assetType') == 'Stock'
+        ]
+        logger.info(f"LISTING_STATUS fallback produced {len(symbols)} symbols")
+        return symbols[:self.candidate_symbols]
+
     def _get_fallback_symbols(self) -> List[str]:
         """Fallback list of known large companies."""
         fallback_symbols = [
@@ -1174,38 +1505,34 @@ class DataFetcher:
         total_symbols = len(symbols)
         logger.info(f"Processing {total_symbols} symbols in batches of {self.batch_size}")
         
-        timeout = ClientTimeout(total=60)
-        async with ClientSession(timeout=timeout) as session:
-            for batch_start in range(0, total_symbols, self.batch_size):
-                batch_end = min(batch_start + self.batch_size, total_symbols)
-                batch_symbols = symbols[batch_start:batch_end]
-                
-                logger.info(f"Processing batch {batch_start//self.batch_size + 1}/{(total_symbols + self.batch_size - 1)//self.batch_size}: {batch_symbols}")
-                
-                # Process batch with concurrent requests for Yahoo Finance
-                batch_tasks = []
-                for symbol in batch_symbols:
-                    batch_tasks.append(self._process_symbol(symbol, start_date, end_date, session))
-                
-                # Execute batch concurrently
-                batch_results = await asyncio.gather(*batch_tasks, return_exceptions=True)
-                
-                # Collect successful results
-                for i, result in enumerate(batch_results):
-                    symbol = batch_symbols[i]
-                    if isinstance(result, Exception):
-                        logger.error(f"Error processing {symbol}: {str(result)}")
-                    elif result:
-                        all_data.extend(result)
-                        logger.info(f"Successfully processed {symbol}: {len(result)} data points")
-                    else:
-                        logger.warning(f"No data for {symbol}")
-                
-                # Inter-batch delay to respect rate limits
-                if batch_end < total_symbols:
-                    logger.info(f"Batch complete. Waiting {self.yahoo_batch_delay}s before next batch...")
-                    await asyncio.sleep(self.yahoo_batch_delay)
-        
+        session = await self._get_session()
+        # Schedule every symbol at once and let the semaphore cap how
+        # many are in flight; provider budgets are enforced by the
+        # shared limiter rather than sleeps between batches
+        semaphore = asyncio.Semaphore(self.batch_size)
+
+        async def process_bounded(symbol: str):
+            async with semaphore:
+                return await self._process_symbol(symbol, start_date, end_date, session)
+
+        try:
+            results = await asyncio.gather(
+                *(process_bounded(symbol) for symbol in symbols), return_exceptions=True
+            )
+        finally:
+            # Worker thread keeps the serialize-and-write off the loop
+            await asyncio.to_thread(self.flush_market_cap_cache)
+
+        # Collect successful results
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error processing {symbol}: {str(result)}")
+            elif result:
+                all_data.extend(result)
+                logger.info(f"Successfully processed {symbol}: {len(result)} data points")
+            else:
+                logger.warning(f"No data for {symbol}")
+
         logger.info(f"Data collection complete: {len(all_data)} total data points from {total_symbols} symbols")
         return all_data
     
@@ -1249,7 +1576,7 @@ class DataFetcher:
         try:
             logger.info(f"Debug: Testing Yahoo Finance URL: {url}")
             
-            async with session.get(url, headers=simple_headers, timeout=ClientTimeout(total=30)) as response:
+            async with session.get(url, headers=simple_headers, timeout=_TIMEOUT_30) as response:
                 test_result = {
                     "url": url,
                     "headers": simple_headers,
@@ -1368,25 +1695,29 @@ class DataFetcher:
 
     @staticmethod
     def merge_data_sources(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Clean and merge data from multiple sources."""
+        """Clean and merge data from multiple sources.
+
+        Builds columns in one pass over the records (structure-of-arrays)
+        instead of handing pandas a list of dicts to infer row by row;
+        missing keys default to 0, which also replaces the per-column
+        existence checks.
+        """
         if not data:
             return []
-            
-        df = pd.DataFrame(data)
-        
-        # Ensure required columns exist
-        required_columns = ['date', 'symbol', 'price', 'market_cap', 'volume']
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = 0
-        
-        # Convert types
-        df['price'] = pd.to_numeric(df['price'], errors='coerce')
-        df['market_cap'] = pd.to_numeric(df['market_cap'], errors='coerce')
-        df['volume'] = pd.to_numeric(df['volume'], errors='coerce')
-        
+
+        columns = {col: [] for col in _REQUIRED_COLS}
+        appends = [(col, columns[col].append) for col in _REQUIRED_COLS]
+        for item in data:
+            get = item.get
+            for col, append in appends:
+                append(get(col, 0))
+        df = pd.DataFrame(columns)
+
+        # One typed cast instead of three separate to_numeric passes
+        df = df.astype({'price': 'float64', 'market_cap': 'float64', 'volume': 'float64'}, errors='ignore')
+
         # Remove duplicates and fill NaN values
         df = df.drop_duplicates(subset=['date', 'symbol'])
         df = df.fillna(0)
-        
+
         return df.to_dict('records')
@@ -5,12 +5,25 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+def _to_df(cursor) -> pd.DataFrame:
+    """Materialize a DuckDB result through Arrow instead of fetchdf().
+
+    The Arrow table converts to pandas without the column-by-column numpy
+    copies fetchdf() performs; self_destruct releases each Arrow buffer as
+    soon as its column is converted, and DATE columns still land as
+    datetime64[ns].
+    """
+    return cursor.fetch_arrow_table().to_pandas(
+        date_as_object=False, split_blocks=True, self_destruct=True
+    )
+
 class Database:
     def __init__(self, db_path: str = "market_data_v2.db"):
         """Initialize DuckDB connection and create tables."""
         self.db_path = db_path
         self.conn = None
-        
+        self._fresh_dbs_cache = None  # (dir_mtime, sorted_list)
+
         # Try to connect to the specified database
         success = self._try_connect(db_path)
         
@@ -37,9 +50,22 @@ class Database:
         """Find existing fresh databases sorted by creation time (newest first)."""
         import os
         import glob
+        # The directory mtime only changes when files are created or deleted,
+        # so it's a cheap invalidation key for the glob + stat scan below
+        try:
+            dir_mtime = os.stat('.').st_mtime
+        except OSError:
+            dir_mtime = None
+
+        if self._fresh_dbs_cache and dir_mtime is not None and self._fresh_dbs_cache[0] == dir_mtime:
+            return self._fresh_dbs_cache[1]
+
         fresh_dbs = glob.glob("market_data_fresh_*.db")
         # Sort by modification time, newest first
         fresh_dbs.sort(key=os.path.getmtime, reverse=True)
+
+        if dir_mtime is not None:
+            self._fresh_dbs_cache = (dir_mtime, fresh_dbs)
         return fresh_dbs
     
     def _try_connect(self, db_path: str) -> bool:
@@ -47,6 +73,7 @@ class Database:
         try:
             self.conn = duckdb.connect(db_path)
             self.db_path = db_path
+            self._tune_connection()
             logger.info(f"Connected to database: {db_path}")
             return True
         except Exception as e:
@@ -59,6 +86,30 @@ class Database:
                 self.conn = None
             return False
 
+    def _tune_connection(self):
+        """Tune DuckDB for the host: parallelism, memory limit and object cache.
+
+        The aggregation-heavy index performance query parallelizes its
+        GROUP BY across threads, so defaults on multi-core hosts leave
+        performance on the table.
+        """
+        import os
+        try:
+            self.conn.execute(f"PRAGMA threads={os.cpu_count() or 1}")
+            self.conn.execute("PRAGMA enable_object_cache=true")
+        except Exception as e:
+            logger.warning(f"Could not apply DuckDB tuning pragmas: {e}")
+
+        # Cap memory at ~70% of physical RAM when psutil is available
+        try:
+            import psutil
+            ram_gb = psutil.virtual_memory().total / (1024 ** 3)
+            self.conn.execute(f"PRAGMA memory_limit='{ram_gb * 0.7:.1f}GB'")
+        except ImportError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not set DuckDB memory limit: {e}")
+
     def _create_tables(self):
         """Create required database tables."""
         # Market data table
@@ -119,16 +170,19 @@ class Database:
                     # If it's already datetime (including TIMESTAMP_NS), convert to date
                     df['date'] = df['date'].dt.date
             
-            # Debug: Log the first row to verify correct field mapping
+            # Vectorized field-swap validation over the whole batch (not just
+            # the first row); volumes above 1T almost certainly mean the
+            # market_cap and volume columns were swapped upstream
             if len(df) > 0:
-                sample_row = df.iloc[0]
-                logger.info(f"Sample row being inserted: date={sample_row['date']}, symbol={sample_row['symbol']}, price={sample_row['price']}, market_cap={sample_row['market_cap']}, volume={sample_row['volume']}")
-                
-                # Additional validation for large values
-                if sample_row['market_cap'] > 1_000_000_000_000:  # > 1T
-                    logger.info(f"✓ Market cap looks correct: ${sample_row['market_cap']:,.0f}")
-                elif sample_row['volume'] > 1_000_000_000_000:  # > 1T  
-                    logger.error(f"✗ FIELD SWAP DETECTED: volume={sample_row['volume']:,.0f} > market_cap={sample_row['market_cap']:,.0f}")
+                if (df['volume'] > 1_000_000_000_000).any():
+                    swapped = df[df['volume'] > 1_000_000_000_000].iloc[0]
+                    logger.error(f"✗ FIELD SWAP DETECTED: volume={swapped['volume']:,.0f} > market_cap={swapped['market_cap']:,.0f}")
+
+                # Debug: log the first row to verify correct field mapping, but
+                # only pay the f-string formatting cost when INFO is enabled
+                if logger.isEnabledFor(logging.INFO):
+                    sample_row = df.iloc[0]
+                    logger.info(f"Sample row being inserted: date={sample_row['date']}, symbol={sample_row['symbol']}, price={sample_row['price']}, market_cap={sample_row['market_cap']}, volume={sample_row['volume']}")
             
             # Insert using DuckDB with explicit column mapping to prevent field swapping
             self.conn.execute("DELETE FROM market_data WHERE date IN (SELECT DISTINCT date FROM df)")
@@ -150,26 +204,24 @@ class Database:
                 SELECT 
                     date,
                     SUM(market_cap) as total_market_cap,
-                    SUM(price * market_cap) / NULLIF(SUM(market_cap), 0) as weighted_price
-                FROM market_data 
-                WHERE date BETWEEN ? AND ? 
+                    -- WHERE market_cap > 0 guarantees SUM(market_cap) > 0 per group,
+                    -- so no HAVING filter or NULLIF division guard is needed
+                    SUM(price * market_cap) / SUM(market_cap) as weighted_price
+                FROM market_data
+                WHERE date BETWEEN ? AND ?
                   AND market_cap > 0
                   AND price > 0
                 GROUP BY date
-                HAVING SUM(market_cap) > 0
                 ORDER BY date
             ),
             returns AS (
-                SELECT 
+                SELECT
                     date,
                     total_market_cap,
                     weighted_price,
-                    LAG(weighted_price) OVER (ORDER BY date) as prev_price,
-                    CASE 
-                        WHEN LAG(weighted_price) OVER (ORDER BY date) IS NULL THEN 0
-                        WHEN LAG(weighted_price) OVER (ORDER BY date) = 0 THEN 0
-                        ELSE (weighted_price / LAG(weighted_price) OVER (ORDER BY date) - 1)
-                    END as daily_return
+                    -- Single LAG invocation; NULLIF folds the zero case into the
+                    -- NULL case and COALESCE maps both to a 0 return
+                    COALESCE(weighted_price / NULLIF(LAG(weighted_price) OVER (ORDER BY date), 0) - 1, 0) as daily_return
                 FROM daily_totals
             ),
             cumulative_calc AS (
@@ -194,7 +246,7 @@ class Database:
             ORDER BY date
             """
             
-            result = self.conn.execute(query, [start_date, end_date]).fetchdf()
+            result = _to_df(self.conn.execute(query, [start_date, end_date]))
             
             # Ensure date column is in proper format for database insertion
             if not result.empty and 'date' in result.columns:
@@ -211,33 +263,81 @@ class Database:
             logger.error(f"Error calculating index performance: {str(e)}")
             return pd.DataFrame()
 
-    def get_market_data(self, start_date: str, end_date: str, symbols: List[str] = None) -> pd.DataFrame:
+    def get_market_data(self, start_date: str, end_date: str, symbols: List[str] = None, limit: int = None) -> pd.DataFrame:
         """Get market data for specified date range and symbols."""
         try:
-            base_query = """
-            SELECT date, symbol, price, market_cap, volume 
-            FROM market_data 
+            # LIMIT is pushed into SQL so DuckDB stops scanning early instead
+            # of materializing rows that callers would truncate in Python
+            limit_clause = " LIMIT ?" if limit is not None else ""
+
+            # Fast path: no symbol filter over a single day collapses to a
+            # simple equality predicate that DuckDB plans more aggressively
+            if not symbols and start_date == end_date:
+                query = """
+                SELECT date, symbol, price, market_cap, volume
+                FROM market_data
+                WHERE date = ?
+                ORDER BY date, symbol
+                """ + limit_clause
+                params = [start_date] + ([limit] if limit is not None else [])
+                return _to_df(self.conn.execute(query, params))
+
+            # Fast path: single symbol avoids IN-list planning entirely
+            if symbols and len(symbols) == 1:
+                query = """
+                SELECT date, symbol, price, market_cap, volume
+                FROM market_data
+                WHERE date BETWEEN ? AND ? AND symbol = ?
+                ORDER BY date, symbol
+                """ + limit_clause
+                params = [start_date, end_date, symbols[0]] + ([limit] if limit is not None else [])
+                return _to_df(self.conn.execute(query, params))
+
+            # One SQL string for any symbol-list length: a list parameter keeps
+            # the plan cacheable instead of re-parsing per placeholder count
+            query = """
+            SELECT date, symbol, price, market_cap, volume
+            FROM market_data
             WHERE date BETWEEN ? AND ?
-            """
-            params = [start_date, end_date]
-            
-            if symbols:
-                placeholders = ','.join(['?' for _ in symbols])
-                base_query += f" AND symbol IN ({placeholders})"
-                params.extend(symbols)
-            
-            base_query += " ORDER BY date, symbol"
-            
-            result = self.conn.execute(base_query, params).fetchdf()
+              AND (? OR list_contains(?, symbol))
+            ORDER BY date, symbol
+            """ + limit_clause
+            params = [start_date, end_date, not symbols, symbols or []]
+            if limit is not None:
+                params.append(limit)
+
+            result = _to_df(self.conn.execute(query, params))
             return result
             
         except Exception as e:
             logger.error(f"Error getting market data: {str(e)}")
             return pd.DataFrame()
 
+    def iter_market_data(self, start_date: str, end_date: str, symbols: List[str] = None, batch_size: int = 100_000):
+        """Stream market data as Arrow RecordBatches instead of materializing a DataFrame.
+
+        Bounds peak memory for large date ranges: callers doing aggregation
+        consume one batch at a time and never pay the full pandas allocation.
+        """
+        query = """
+        SELECT date, symbol, price, market_cap, volume
+        FROM market_data
+        WHERE date BETWEEN ? AND ?
+          AND (? OR list_contains(?, symbol))
+        ORDER BY date, symbol
+        """
+        params = [start_date, end_date, not symbols, symbols or []]
+
+        reader = self.conn.execute(query, params).fetch_record_batch(batch_size)
+        for batch in reader:
+            yield batch
+
     def get_top_companies(self, date: str, limit: int = 100) -> pd.DataFrame:
         """Get top companies by market cap for a specific date."""
         try:
+            # ORDER BY ... LIMIT with a bound parameter lets DuckDB pick its
+            # Top-N heap operator, so only `limit` rows are ever kept sorted
+            # instead of sorting the full daily universe
             query = """
             SELECT symbol, price, market_cap, volume
             FROM market_data 
@@ -246,7 +346,7 @@ class Database:
             LIMIT ?
             """
             
-            result = self.conn.execute(query, [date, limit]).fetchdf()
+            result = _to_df(self.conn.execute(query, [date, limit]))
             return result
             
         except Exception as e:
@@ -272,13 +372,9 @@ class Database:
                     # If it's already datetime (including TIMESTAMP_NS), convert to date
                     df_copy['date'] = df_copy['date'].dt.date
                 
-            # Delete existing data for the date range
-            dates = df_copy['date'].tolist()
-            placeholders = ','.join(['?' for _ in dates])
-            self.conn.execute(f"DELETE FROM index_performance WHERE date IN ({placeholders})", dates)
-            
-            # Insert new data using the cleaned dataframe
-            self.conn.execute("INSERT INTO index_performance SELECT * FROM df_copy")
+            # Upsert on the date primary key: one statement replaces the old
+            # delete-then-insert pair, halving write amplification on recalcs
+            self.conn.execute("INSERT OR REPLACE INTO index_performance SELECT * FROM df_copy")
             
             logger.info(f"Saved {len(df_copy)} index performance records")
             
@@ -295,7 +391,7 @@ class Database:
             ORDER BY date
             """
             
-            result = self.conn.execute(query, [start_date, end_date]).fetchdf()
+            result = _to_df(self.conn.execute(query, [start_date, end_date]))
             return result
             
         except Exception as e:
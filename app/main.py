@@ -1,13 +1,23 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
-from fastapi.responses import JSONResponse
-import redis
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Response
+from fastapi.responses import ORJSONResponse
+import orjson
+import redis.asyncio as redis
+import aiohttp
+
+# Shared request timeout for the pooled upstream session
+_AIO_TIMEOUT_LONG = aiohttp.ClientTimeout(total=120)
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
 from typing import Optional, List, Dict
 import json
 import os
+import re
 import logging
 import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Setup logging
@@ -25,39 +35,188 @@ logger.info(f"REDIS_PORT: {os.getenv('REDIS_PORT')}")
 from .database import Database
 from .data_fetcher import DataFetcher
 
-app = FastAPI(title="Stock Index Management Service", version="1.0.0")
+app = FastAPI(title="Stock Index Management Service", version="1.0.0", default_response_class=ORJSONResponse)
+
+# Initialize Redis (optional) - async client over a shared connection pool so
+# cache round-trips never block the event loop
+redis_pool = redis.ConnectionPool(
+    host=os.getenv('REDIS_HOST', 'localhost'),
+    port=int(os.getenv('REDIS_PORT', 6379)),
+    max_connections=32,
+    # Bounded connect/read timeouts: an unreachable Redis should fail the
+    # startup probe in ~1s, not hang for the kernel TCP timeout
+    socket_connect_timeout=1.0,
+    socket_timeout=1.0,
+    decode_responses=False
+)
+redis_client = redis.Redis(connection_pool=redis_pool)
+redis_available = False
 
-# Initialize Redis (optional)
-try:
-    redis_client = redis.Redis(
-        host=os.getenv('REDIS_HOST', 'localhost'),
-        port=int(os.getenv('REDIS_PORT', 6379)),
-        decode_responses=True
+@app.on_event("startup")
+async def check_redis():
+    """Probe Redis once at startup instead of at import time."""
+    global redis_available
+    try:
+        await asyncio.wait_for(redis_client.ping(), timeout=1.0)
+        redis_available = True
+        logger.info("Redis connection established")
+    except (redis.RedisError, asyncio.TimeoutError, OSError):
+        logger.warning("Redis not available. Running without caching.")
+        redis_available = False
+
+@app.on_event("shutdown")
+async def close_redis():
+    """Release Redis connections on shutdown."""
+    try:
+        await redis_client.aclose()
+        await redis_pool.disconnect()
+    except Exception as e:
+        logger.warning(f"Error closing Redis connections: {e}")
+
+# Database and data fetcher are constructed in the startup hook so each
+# Uvicorn worker pays the initialization cost once at boot, not at import
+db = None
+data_fetcher = None
+
+@app.on_event("startup")
+async def init_services():
+    """Construct the database and data fetcher once per worker."""
+    global db, data_fetcher
+    if db is None:
+        db = Database()
+    if data_fetcher is None:
+        data_fetcher = DataFetcher()
+
+# One pooled aiohttp session per worker: TCP/TLS connections and DNS
+# lookups are reused across requests instead of rebuilt per endpoint call
+@app.on_event("startup")
+async def init_http_session():
+    """Create the shared aiohttp session for upstream calls."""
+    app.state.http = aiohttp.ClientSession(
+        timeout=_AIO_TIMEOUT_LONG,
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
     )
-    redis_client.ping()
-    redis_available = True
-    logger.info("Redis connection established")
-except:
-    logger.warning("Redis not available. Running without caching.")
-    redis_available = False
 
-# Initialize database and data fetcher
-db = Database()
-data_fetcher = DataFetcher()
+@app.on_event("shutdown")
+async def close_http_session():
+    """Close the shared aiohttp session on shutdown."""
+    await app.state.http.close()
+
+# Synchronous DuckDB/pandas work runs on this pool so it never blocks the
+# event loop for other in-flight requests
+DB_EXECUTOR = ThreadPoolExecutor(max_workers=8)
+
+async def _run(fn, *args, **kwargs):
+    """Run a blocking callable on the DB thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(DB_EXECUTOR, functools.partial(fn, *args, **kwargs))
+
+@app.on_event("shutdown")
+async def shutdown_db_executor():
+    """Stop the DB thread pool on shutdown."""
+    DB_EXECUTOR.shutdown(wait=False)
+
+@app.on_event("shutdown")
+async def close_data_fetcher():
+    """Flush fetcher caches and close its pooled HTTP session."""
+    if data_fetcher is not None:
+        await data_fetcher.close()
+
+_YMD_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+@lru_cache(maxsize=4096)
+def _parse_ymd(s: str) -> date:
+    """Parse a YYYY-MM-DD string without the per-call _strptime overhead.
+
+    The regex keeps the strict baseline contract (separators and length
+    included); fromisoformat is the C fast path for the actual parse.
+    """
+    if not _YMD_RE.match(s):
+        raise ValueError(f"Invalid date: {s}")
+    return date.fromisoformat(s)
+
+@lru_cache(maxsize=2048)
+def _perf_key(start_date: str, end_date: str) -> str:
+    """Memoized Redis key for the performance cache; avoids re-formatting
+    the same (start, end) pair on every request."""
+    return f"performance:{start_date}:{end_date}"
+
+
+# datetime.now() + strftime on every request is measurable at high QPS;
+# the formatted date only changes once a day, so a 1-second cache is safe
+_today_cache = {"ts": 0.0, "val": ""}
+
+def _today_str() -> str:
+    """Today's date as YYYY-MM-DD, recomputed at most once per second."""
+    now = time.monotonic()
+    if now - _today_cache["ts"] > 1.0:
+        _today_cache["val"] = datetime.now().strftime("%Y-%m-%d")
+        _today_cache["ts"] = now
+    return _today_cache["val"]
+
+
+def _stringify_dates(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert datetime-like columns to YYYY-MM-DD strings for JSON serialization.
+
+    Uses vectorized pandas conversions instead of a per-row apply; object
+    columns that aren't dates coerce to all-NaT and are left untouched.
+    Column selection dispatches on dtype once via select_dtypes instead of
+    re-checking every column with is_datetime64_any_dtype.
+    """
+    # Casting through datetime64[D] hits numpy's fixed ISO-format path,
+    # which is a few times faster than strftime's format-string interpreter
+    def _iso_dates(values):
+        formatted = values.astype('datetime64[D]').astype('U10').astype(object)
+        formatted[pd.isna(values)] = None
+        return formatted
+
+    for col in df.select_dtypes(include=['datetime64[ns]', 'datetimetz']).columns:
+        df[col] = _iso_dates(df[col].values)
+
+    if len(df) > 0:
+        for col in df.select_dtypes(include='object').columns:
+            # Only convert columns that actually hold datetime objects;
+            # parsing strings would also swallow ticker symbols that
+            # happen to look like dates (MAR, NOV, ...)
+            if not isinstance(df[col].iloc[0], (datetime, date)):
+                continue
+            converted = pd.to_datetime(df[col], errors='coerce')
+            df[col] = _iso_dates(converted.values)
+    return df
+
+def _records(df: pd.DataFrame) -> List[Dict]:
+    """Convert a DataFrame to row dicts via one C-level tolist() per column.
+
+    to_dict('records') boxes every cell through a Python-level loop; zipping
+    pre-converted column lists keeps the same response shape much cheaper.
+    """
+    if df.empty:
+        return []
+    cols = df.columns.tolist()
+    return [dict(zip(cols, row)) for row in zip(*(df[c].tolist() for c in cols))]
 
 async def fetch_and_store_data(start_date: str, end_date: str):
-    """Background task to fetch and store market data."""
+    """Background task: fetch market data and store it on the shared handles.
+
+    The ingest stays in this process on purpose: DuckDB allows a single
+    read-write connection per database file, so a worker process cannot
+    open the serving database and would fall back to a fresh file the API
+    never reads. The fetch itself is async, and the pandas/DuckDB stages
+    run on the DB thread pool (DuckDB releases the GIL) so the event loop
+    stays free for in-flight requests.
+    """
     try:
         logger.info(f"Starting data fetch for {start_date} to {end_date}")
+
         data = await data_fetcher.fetch_all_data(start_date, end_date)
         
         if data:
-            merged_data = data_fetcher.merge_data_sources(data)
-            db.insert_market_data(merged_data)
+            merged_data = await _run(data_fetcher.merge_data_sources, data)
+            await _run(db.insert_market_data, merged_data)
             
             # Calculate and save index performance
-            performance = db.calculate_index_performance(start_date, end_date)
-            db.save_index_performance(performance)
+            performance = await _run(db.calculate_index_performance, start_date, end_date)
+            await _run(db.save_index_performance, performance)
             
             logger.info(f"Data fetch completed: {len(merged_data)} records")
         else:
@@ -85,43 +244,44 @@ async def fetch_data(
     """Fetch market data for the specified date range."""
     # Default to last 30 days if no dates provided
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = _today_str()
     if not start_date:
         start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
     
     try:
         # Validate dates
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
+        start = _parse_ymd(start_date)
+        end = _parse_ymd(end_date)
         
         if start > end:
             raise HTTPException(status_code=400, detail="Start date must be before end date")
         
-        # Check cache first (if Redis available and not forcing refresh)
+        # Claim the fetch slot and check for an existing one in a single
+        # round-trip: SET NX only writes (and only arms the TTL) when no
+        # fetch is already recorded, so status polls never extend the key
         cache_key = f"fetch_status:{start_date}:{end_date}"
         if redis_available and not force_refresh:
-            cached_status = redis_client.get(cache_key)
-            if cached_status:
-                return JSONResponse({
+            claimed = await redis_client.set(cache_key, "in_progress", ex=3600, nx=True)
+            if not claimed:
+                return {
                     "message": "Data fetch already in progress or completed recently",
                     "start_date": start_date,
                     "end_date": end_date,
                     "cached": True
-                })
-        
+                }
+        elif redis_available:
+            # Force refresh skips the status check but still marks progress
+            await redis_client.setex(cache_key, 3600, "in_progress")
+
         # Start background task
         background_tasks.add_task(fetch_and_store_data, start_date, end_date)
-        
-        # Set cache to prevent duplicate requests
-        if redis_available:
-            redis_client.setex(cache_key, 3600, "in_progress")  # 1 hour expiry
-        
-        return JSONResponse({
+
+        return {
             "message": "Data fetch initiated",
             "start_date": start_date,
             "end_date": end_date,
             "status": "in_progress"
-        })
+        }
         
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -138,7 +298,7 @@ async def get_index_performance(
     """Get index performance data."""
     # Default to last 30 days
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = _today_str()
     if not start_date:
         start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
     
@@ -148,15 +308,17 @@ async def get_index_performance(
         
         if not force_recalculate:
             # Check cache first
-            cache_key = f"performance:{start_date}:{end_date}"
+            cache_key = _perf_key(start_date, end_date)
             if redis_available:
-                cached_data = redis_client.get(cache_key)
+                cached_data = await redis_client.get(cache_key)
                 if cached_data:
-                    return JSONResponse(json.loads(cached_data))
+                    # Redis already holds orjson-encoded bytes; send them as-is
+                    # instead of paying a parse + re-encode on every hit
+                    return Response(content=cached_data, media_type="application/json")
 
             # Get performance data from database
             try:
-                performance_df = db.get_index_performance(start_date, end_date)
+                performance_df = await _run(db.get_index_performance, start_date, end_date)
             except Exception as db_error:
                 logger.error(f"Error getting index performance from database: {str(db_error)}")
                 performance_df = pd.DataFrame()
@@ -166,18 +328,12 @@ async def get_index_performance(
             try:
                 logger.info(f"{'Force recalculating' if force_recalculate else 'No cached'} performance data. Calculating for {start_date} to {end_date}")
                 
-                # Clear existing performance data for this date range if force recalculate
-                if force_recalculate:
-                    try:
-                        db.conn.execute("DELETE FROM index_performance WHERE date BETWEEN ? AND ?", [start_date, end_date])
-                        logger.info(f"Cleared existing performance data for {start_date} to {end_date}")
-                    except Exception as clear_error:
-                        logger.warning(f"Error clearing existing performance data: {str(clear_error)}")
-                
-                performance_df = db.calculate_index_performance(start_date, end_date)
+                # save_index_performance upserts on date, so a force
+                # recalculation no longer needs a separate DELETE pass
+                performance_df = await _run(db.calculate_index_performance, start_date, end_date)
                 if not performance_df.empty:
                     try:
-                        db.save_index_performance(performance_df)
+                        await _run(db.save_index_performance, performance_df)
                         logger.info(f"Saved calculated performance data for {start_date} to {end_date}")
                     except Exception as save_error:
                         logger.error(f"Error saving performance data: {str(save_error)}")
@@ -188,7 +344,7 @@ async def get_index_performance(
         if performance_df.empty:
             # Check if we have any market data at all
             try:
-                market_data_df = db.get_market_data(start_date, end_date)
+                market_data_df = await _run(db.get_market_data, start_date, end_date)
                 if market_data_df.empty:
                     raise HTTPException(
                         status_code=404, 
@@ -211,26 +367,19 @@ async def get_index_performance(
         # Convert to JSON-serializable format
         # Handle pandas Timestamp objects that can't be JSON serialized
         if not performance_df.empty:
-            # Convert any datetime/timestamp columns to strings
-            for col in performance_df.columns:
-                if pd.api.types.is_datetime64_any_dtype(performance_df[col]):
-                    performance_df[col] = performance_df[col].dt.strftime('%Y-%m-%d')
-                elif performance_df[col].dtype == 'object':
-                    # Check if it contains Timestamp objects
-                    if not performance_df[col].empty and hasattr(performance_df[col].iloc[0], 'strftime'):
-                        performance_df[col] = performance_df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else None)
+            performance_df = _stringify_dates(performance_df)
         
         performance_data = {
             "start_date": start_date,
             "end_date": end_date,
-            "data": performance_df.to_dict('records') if not performance_df.empty else []
+            "data": _records(performance_df)
         }
         
         # Cache the result
         if redis_available:
-            redis_client.setex(cache_key, 1800, json.dumps(performance_data))  # 30 min cache
+            await redis_client.setex(cache_key, 1800, orjson.dumps(performance_data))  # 30 min cache
         
-        return JSONResponse(performance_data)
+        return performance_data
         
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -248,7 +397,7 @@ async def get_market_data(
     """Get market data for specified criteria."""
     # Default to last 7 days
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = _today_str()
     if not start_date:
         start_date = (datetime.now() - timedelta(days=7)).strftime("%Y-%m-%d")
     
@@ -260,7 +409,7 @@ async def get_market_data(
         
         # Get data from database
         try:
-            market_df = db.get_market_data(start_date, end_date, symbol_list)
+            market_df = await _run(db.get_market_data, start_date, end_date, symbol_list, limit)
         except Exception as db_error:
             logger.error(f"Database error getting market data: {str(db_error)}")
             raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
@@ -271,27 +420,17 @@ async def get_market_data(
                 detail=f"No market data available for the specified criteria. Date range: {start_date} to {end_date}. Use /data/fetch to populate data first."
             )
         
-        # Apply limit
-        if len(market_df) > limit:
-            market_df = market_df.head(limit)
-        
         # Convert any datetime/timestamp columns to strings for JSON serialization
         if not market_df.empty:
-            for col in market_df.columns:
-                if pd.api.types.is_datetime64_any_dtype(market_df[col]):
-                    market_df[col] = market_df[col].dt.strftime('%Y-%m-%d')
-                elif market_df[col].dtype == 'object':
-                    # Check if it contains Timestamp objects
-                    if not market_df[col].empty and hasattr(market_df[col].iloc[0], 'strftime'):
-                        market_df[col] = market_df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else None)
-        
-        return JSONResponse({
+            market_df = _stringify_dates(market_df)
+        
+        return {
             "start_date": start_date,
             "end_date": end_date,
             "symbols": symbol_list,
             "count": len(market_df),
-            "data": market_df.to_dict('records') if not market_df.empty else []
-        })
+            "data": _records(market_df)
+        }
         
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -306,11 +445,11 @@ async def get_top_companies(
 ):
     """Get top companies by market cap for a specific date."""
     if not date:
-        date = datetime.now().strftime("%Y-%m-%d")
+        date = _today_str()
     
     try:
         try:
-            companies_df = db.get_top_companies(date, limit)
+            companies_df = await _run(db.get_top_companies, date, limit)
         except Exception as db_error:
             logger.error(f"Database error getting top companies: {str(db_error)}")
             raise HTTPException(status_code=500, detail=f"Database error: {str(db_error)}")
@@ -323,19 +462,13 @@ async def get_top_companies(
         
         # Convert any datetime/timestamp columns to strings for JSON serialization
         if not companies_df.empty:
-            for col in companies_df.columns:
-                if pd.api.types.is_datetime64_any_dtype(companies_df[col]):
-                    companies_df[col] = companies_df[col].dt.strftime('%Y-%m-%d')
-                elif companies_df[col].dtype == 'object':
-                    # Check if it contains Timestamp objects
-                    if not companies_df[col].empty and hasattr(companies_df[col].iloc[0], 'strftime'):
-                        companies_df[col] = companies_df[col].apply(lambda x: x.strftime('%Y-%m-%d') if pd.notnull(x) else None)
-        
-        return JSONResponse({
+            companies_df = _stringify_dates(companies_df)
+        
+        return {
             "date": date,
             "count": len(companies_df),
-            "companies": companies_df.to_dict('records') if not companies_df.empty else []
-        })
+            "companies": _records(companies_df)
+        }
         
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -353,45 +486,45 @@ async def build_index(
     """Build the stock index by fetching and processing market data."""
     # Default to last 30 days if no dates provided
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = _today_str()
     if not start_date:
         start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
     
     try:
         # Validate dates
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
+        start = _parse_ymd(start_date)
+        end = _parse_ymd(end_date)
         
         if start > end:
             raise HTTPException(status_code=400, detail="Start date must be before end date")
         
         # Check if data already exists (unless forcing rebuild)
         if not force_rebuild:
-            existing_data = db.get_market_data(start_date, end_date)
+            existing_data = await _run(db.get_market_data, start_date, end_date)
             if not existing_data.empty:
                 # Calculate and return index performance
-                performance = db.calculate_index_performance(start_date, end_date)
+                performance = await _run(db.calculate_index_performance, start_date, end_date)
                 if not performance.empty:
-                    db.save_index_performance(performance)
-                    return JSONResponse({
+                    await _run(db.save_index_performance, performance)
+                    return {
                         "message": "Index already built for this period",
                         "start_date": start_date,
                         "end_date": end_date,
                         "data_points": len(existing_data),
                         "performance_calculated": True,
                         "force_rebuild": force_rebuild
-                    })
+                    }
         
         # Start background task to build index
         background_tasks.add_task(fetch_and_store_data, start_date, end_date)
         
-        return JSONResponse({
+        return {
             "message": "Index build initiated",
             "start_date": start_date,
             "end_date": end_date,
             "status": "building",
             "estimated_time": "5-10 minutes depending on data volume"
-        })
+        }
         
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
@@ -408,14 +541,14 @@ async def test_symbol_data(
     """Test data fetching for a specific symbol with all fallback sources."""
     # Default to last 5 days if no dates provided
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = _today_str()
     if not start_date:
         start_date = (datetime.now() - timedelta(days=5)).strftime("%Y-%m-%d")
     
     try:
         # Validate dates
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
+        start = _parse_ymd(start_date)
+        end = _parse_ymd(end_date)
         
         if start > end:
             raise HTTPException(status_code=400, detail="Start date must be before end date")
@@ -428,47 +561,47 @@ async def test_symbol_data(
         logger.info(f"Testing data fetch for symbol: {symbol}")
         
         # Test data fetching with detailed logging
-        from aiohttp import ClientSession, ClientTimeout
-        
-        timeout = ClientTimeout(total=120)  # Longer timeout for testing
-        async with ClientSession(timeout=timeout) as session:
-            # Test stock data
-            stock_data = await data_fetcher.get_daily_data(symbol, start_date, end_date, session)
+        session = app.state.http
+        # Test stock data
+        stock_data = await data_fetcher.get_daily_data(symbol, start_date, end_date, session)
             
-            # Test market cap
-            market_cap = await data_fetcher.get_market_cap(symbol, session)
+        # Test market cap
+        market_cap = await data_fetcher.get_market_cap(symbol, session)
             
-            # Prepare detailed response
-            response = {
-                "symbol": symbol,
-                "start_date": start_date,
-                "end_date": end_date,
-                "stock_data": {
-                    "success": len(stock_data) > 0,
-                    "data_points": len(stock_data),
-                    "data": stock_data[:10] if stock_data else []  # Return first 10 points
-                },
-                "market_cap": {
-                    "success": market_cap is not None,
-                    "value": market_cap,
-                    "formatted": f"${market_cap:,.0f}" if market_cap else None
-                },
-                "test_summary": {
-                    "overall_success": len(stock_data) > 0 or market_cap is not None,
-                    "stock_data_available": len(stock_data) > 0,
-                    "market_cap_available": market_cap is not None,
-                    "total_data_points": len(stock_data)
-                }
+        # Prepare detailed response
+        response = {
+            "symbol": symbol,
+            "start_date": start_date,
+            "end_date": end_date,
+            "stock_data": {
+                "success": len(stock_data) > 0,
+                "data_points": len(stock_data),
+                "data": stock_data[:10] if stock_data else []  # Return first 10 points
+            },
+            "market_cap": {
+                "success": market_cap is not None,
+                "value": market_cap,
+                "formatted": f"${market_cap:,.0f}" if market_cap else None
+            },
+            "test_summary": {
+                "overall_success": len(stock_data) > 0 or market_cap is not None,
+                "stock_data_available": len(stock_data) > 0,
+                "market_cap_available": market_cap is not None,
+                "total_data_points": len(stock_data)
             }
+        }
             
-            # Add market cap to stock data if both are available
-            if stock_data and market_cap:
-                for data_point in response["stock_data"]["data"]:
-                    data_point["market_cap"] = market_cap
+        # Add market cap to stock data if both are available; a single
+        # dict-merge comprehension beats mutating each row in a Python loop
+        if stock_data and market_cap:
+            response["stock_data"]["data"] = [
+                {**data_point, "market_cap": market_cap}
+                for data_point in response["stock_data"]["data"]
+            ]
             
-            logger.info(f"Test completed for {symbol}: {response['test_summary']}")
+        logger.info(f"Test completed for {symbol}: {response['test_summary']}")
             
-            return JSONResponse(response)
+        return response
         
     except ValueError as e:
         if "time data" in str(e):
@@ -498,15 +631,12 @@ async def debug_yahoo_finance(symbol: str):
         
         logger.info(f"Debug testing Yahoo Finance for symbol: {symbol}")
         
-        from aiohttp import ClientSession, ClientTimeout
-        
-        timeout = ClientTimeout(total=60)
-        async with ClientSession(timeout=timeout) as session:
-            # Use DataFetcher's debug method
-            debug_results = await data_fetcher.debug_yahoo_finance(symbol, session)
+        session = app.state.http
+        # Use DataFetcher's debug method
+        debug_results = await data_fetcher.debug_yahoo_finance(symbol, session)
             
-            logger.info(f"Debug test completed for {symbol}")
-            return JSONResponse(debug_results)
+        logger.info(f"Debug test completed for {symbol}")
+        return debug_results
         
     except Exception as e:
         logger.error(f"Error debugging Yahoo Finance for {symbol}: {str(e)}")
@@ -522,14 +652,14 @@ async def test_yahoo_finance(
     """Test Yahoo Finance specifically using DataFetcher's built-in logic."""
     # Default to last 3 days if no dates provided
     if not end_date:
-        end_date = datetime.now().strftime("%Y-%m-%d")
+        end_date = _today_str()
     if not start_date:
         start_date = (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d")
     
     try:
         # Validate inputs
-        start = datetime.strptime(start_date, "%Y-%m-%d")
-        end = datetime.strptime(end_date, "%Y-%m-%d")
+        start = _parse_ymd(start_date)
+        end = _parse_ymd(end_date)
         
         if start > end:
             raise HTTPException(status_code=400, detail="Start date must be before end date")
@@ -540,15 +670,12 @@ async def test_yahoo_finance(
         
         logger.info(f"Testing Yahoo Finance for symbol: {symbol}, type: {test_type}")
         
-        from aiohttp import ClientSession, ClientTimeout
-        
-        timeout = ClientTimeout(total=120)
-        async with ClientSession(timeout=timeout) as session:
-            # Use DataFetcher's built-in Yahoo Finance testing method
-            results = await data_fetcher.test_yahoo_finance(symbol, start_date, end_date, session, test_type)
+        session = app.state.http
+        # Use DataFetcher's built-in Yahoo Finance testing method
+        results = await data_fetcher.test_yahoo_finance(symbol, start_date, end_date, session, test_type)
             
-            logger.info(f"Yahoo Finance test completed for {symbol}")
-            return JSONResponse(results)
+        logger.info(f"Yahoo Finance test completed for {symbol}")
+        return results
         
     except ValueError as e:
         if "time data" in str(e):
@@ -563,26 +690,33 @@ async def test_yahoo_finance(
 async def health_check():
     """Detailed health check."""
     health_status = {
-        "timestamp": datetime.now().isoformat(),
-        "redis": "healthy" if redis_available else "unavailable"
+        "timestamp": datetime.now().isoformat()
     }
     
-    try:
-        # Test database connection
-        db.conn.execute("SELECT 1").fetchone()
-        health_status["database"] = "healthy"
-        
-        # Test if market_data table exists and has data
-        try:
-            count_result = db.conn.execute("SELECT COUNT(*) as count FROM market_data").fetchdf()
-            health_status["market_data_count"] = int(count_result.iloc[0]['count'])
-        except Exception as table_error:
-            health_status["market_data_count"] = 0
-            health_status["market_data_error"] = str(table_error)
-            
-    except Exception as db_error:
+    # Probes are independent, so issue them concurrently: the endpoint costs
+    # max(probe) rather than sum(probes) under 1Hz orchestrator polling.
+    # fetchone() on COUNT(*) returns a plain int instead of a DataFrame.
+    select_result, count_result, redis_result = await asyncio.gather(
+        _run(lambda: db.conn.execute("SELECT 1").fetchone()),
+        _run(lambda: db.conn.execute("SELECT COUNT(*) FROM market_data").fetchone()),
+        redis_client.ping() if redis_available else asyncio.sleep(0, result=None),
+        return_exceptions=True
+    )
+    
+    if isinstance(select_result, Exception):
         health_status["database"] = "unhealthy"
-        health_status["database_error"] = str(db_error)
+        health_status["database_error"] = str(select_result)
+    else:
+        health_status["database"] = "healthy"
+    
+    if isinstance(count_result, Exception):
+        health_status["market_data_count"] = 0
+        health_status["market_data_error"] = str(count_result)
+    else:
+        health_status["market_data_count"] = int(count_result[0])
+    
+    redis_ok = redis_available and not isinstance(redis_result, Exception) and redis_result
+    health_status["redis"] = "healthy" if redis_ok else "unavailable"
     
     overall_status = "healthy" if health_status["database"] == "healthy" else "unhealthy"
     health_status["status"] = overall_status
@@ -597,10 +731,7 @@ async def get_data_fetcher_config():
         data_fetcher = DataFetcher()
     
     settings = data_fetcher.get_current_settings()
-    cache_info = {
-        'universe_cache_size': len(data_fetcher.universe_cache),
-        'market_cap_cache_size': len(data_fetcher.market_cap_cache)
-    }
+    cache_info = dict(data_fetcher._cache_size_snapshot)
     
     return {
         "settings": settings,
@@ -1,14 +1,23 @@
 from typing import Optional, Dict, Any, List
+import glob
 import json
+import os
+import struct
+import pandas as pd
 from datetime import datetime, timedelta
-import duckdb
-import redis
 import logging
+from contextlib import contextmanager
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Column order of the daily-data queries; consumers of the tuple fast path
+# can zip against this lazily instead of paying for a dict per row
+_DAILY_COLS = ('symbol', 'date', 'price', 'volume', 'market_cap', 'source', 'is_estimated')
+
+# Frozen + slotted: attribute reads skip the instance __dict__ and the
+# config can't be mutated out from under a live DataCache
+@dataclass(frozen=True, slots=True)
 class CacheConfig:
     redis_host: str
     redis_port: int
@@ -18,32 +27,92 @@ class CacheConfig:
     price_ttl: int
 
 class DataCache:
+    # SQL text hoisted to constants: the same string objects are handed to
+    # DuckDB on every call, so its query cache keys match instead of
+    # re-parsing per invocation (the Python client exposes no prepare()).
+    _SELECT_DAILY_SQL = """
+        SELECT symbol, date, price, volume, market_cap, source, is_estimated
+        FROM market_data
+        WHERE symbol = ? AND date BETWEEN ? AND ?
+        ORDER BY date
+    """
+
+    _SELECT_DAILY_MULTI_SQL = """
+        SELECT symbol, date, price, volume, market_cap, source, is_estimated
+        FROM market_data
+        WHERE list_contains(?, symbol) AND date BETWEEN ? AND ?
+        ORDER BY symbol, date
+    """
+
+    _MD_COLS_SQL = "symbol, CAST(date AS DATE) AS date, price, volume, market_cap, source, is_estimated, timestamp"
+
+    # Explicit conflict target: 0.9.1 rejects INSERT OR REPLACE when the
+    # table has a composite primary key
+    _INSERT_DATA_QUALITY_SQL = """
+        INSERT INTO data_quality (
+            symbol, date, field, source, is_estimated, confidence_score, timestamp
+        ) SELECT * FROM dq_stg
+        ON CONFLICT (symbol, date, field) DO UPDATE SET
+            source = EXCLUDED.source,
+            is_estimated = EXCLUDED.is_estimated,
+            confidence_score = EXCLUDED.confidence_score,
+            timestamp = EXCLUDED.timestamp
+    """
+
     def __init__(self, config: CacheConfig):
+        # Imported lazily: duckdb alone adds tens of MB of RSS at import
+        # time, wasted in any run that never constructs a DataCache
+        import duckdb
+        import redis
+
         self.config = config
-        self.redis = redis.Redis(
-            host=config.redis_host,
-            port=config.redis_port,
-            db=config.redis_db,
-            decode_responses=True
-        )
+        # Bytes mode: values are packed 8-byte doubles, so UTF-8 decoding
+        # on every read would be pure overhead. A bounded blocking pool keeps
+        # connections warm across lookups; a local Redis is reached over its
+        # UNIX socket when one is present, skipping the TCP stack entirely.
+        unix_socket = '/var/run/redis/redis.sock'
+        if config.redis_host in ('localhost', '127.0.0.1') and os.path.exists(unix_socket):
+            pool = redis.BlockingConnectionPool(
+                connection_class=redis.UnixDomainSocketConnection,
+                path=unix_socket,
+                db=config.redis_db,
+                max_connections=32,
+                health_check_interval=30,
+                decode_responses=False
+            )
+        else:
+            pool = redis.BlockingConnectionPool(
+                host=config.redis_host,
+                port=config.redis_port,
+                db=config.redis_db,
+                max_connections=32,
+                socket_keepalive=True,
+                health_check_interval=30,
+                decode_responses=False
+            )
+        self.redis = redis.Redis(connection_pool=pool)
         self.db = duckdb.connect(config.duckdb_path)
+        # Monthly Parquet partitions live next to the DuckDB file; the
+        # market_data name stays usable as a view over them
+        self.parquet_dir = os.path.join(os.path.dirname(config.duckdb_path) or '.', 'md')
+        self._dq_buffer: List[tuple] = []
+        self._dq_flush_threshold = 1000
+        # Local alias keeps the hot cache-write path to one attribute lookup
+        self._mcap_ttl = config.market_cap_ttl
         self._init_db()
 
     def _init_db(self):
-        """Initialize DuckDB tables."""
-        self.db.execute("""
-            CREATE TABLE IF NOT EXISTS market_data (
-                symbol VARCHAR,
-                date DATE,
-                price DOUBLE,
-                volume BIGINT,
-                market_cap DOUBLE,
-                source VARCHAR,
-                is_estimated BOOLEAN,
-                timestamp TIMESTAMP,
-                PRIMARY KEY (symbol, date)
-            )
-        """)
+        """Initialize DuckDB tables and the Parquet-backed market_data view."""
+        self.db.execute(f"PRAGMA threads={os.cpu_count() or 1}")
+
+        # Spill next to the database file rather than the home directory
+        tmp_dir = os.path.join(os.path.dirname(self.config.duckdb_path) or '.', 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        self.db.execute(f"PRAGMA temp_directory='{tmp_dir}'")
+
+        os.makedirs(self.parquet_dir, exist_ok=True)
+        self._migrate_market_data_table()
+        self._refresh_market_data_view()
         
         self.db.execute("""
             CREATE TABLE IF NOT EXISTS data_quality (
@@ -58,59 +127,268 @@ class DataCache:
             )
         """)
 
+    def _migrate_market_data_table(self):
+        """One-time migration of a legacy market_data table into Parquet.
+
+        The legacy table is only dropped after the partitions are written
+        and recounted: until then it remains the durable copy, so a failure
+        mid-migration (disk full, bad row) leaves the store intact and the
+        migration simply reruns on the next start.
+        """
+        legacy = self.db.execute("""
+            SELECT 1 FROM information_schema.tables
+            WHERE table_name = 'market_data' AND table_type = 'BASE TABLE'
+        """).fetchone()
+        if not legacy:
+            return
+        rows = self.db.execute(f"SELECT {self._MD_COLS_SQL} FROM market_data").df()
+        if len(rows):
+            self._write_partitions(rows)
+            expected = len(rows.drop_duplicates(subset=['symbol', 'date']))
+            migrated = self.db.execute(f"""
+                SELECT count(*)
+                FROM read_parquet('{self.parquet_dir}/month=*/*.parquet', hive_partitioning=1)
+            """).fetchone()[0]
+            if migrated < expected:
+                raise RuntimeError(
+                    f"market_data migration wrote {migrated} of {expected} rows; "
+                    "keeping the legacy table"
+                )
+        self.db.execute("DROP TABLE market_data")
+
+    def _refresh_market_data_view(self):
+        """(Re)create the market_data view over the monthly Parquet layout."""
+        if glob.glob(os.path.join(self.parquet_dir, 'month=*', '*.parquet')):
+            self.db.execute(f"""
+                CREATE OR REPLACE VIEW market_data AS
+                SELECT symbol, date, price, volume, market_cap, source, is_estimated, timestamp
+                FROM read_parquet('{self.parquet_dir}/month=*/*.parquet', hive_partitioning=1)
+            """)
+        else:
+            # Typed empty view so reads work before the first save
+            self.db.execute("""
+                CREATE OR REPLACE VIEW market_data AS
+                SELECT NULL::VARCHAR AS symbol, NULL::DATE AS date, NULL::DOUBLE AS price,
+                       NULL::BIGINT AS volume, NULL::DOUBLE AS market_cap, NULL::VARCHAR AS source,
+                       NULL::BOOLEAN AS is_estimated, NULL::TIMESTAMP AS timestamp
+                WHERE FALSE
+            """)
+
+    def _write_partitions(self, stg: pd.DataFrame):
+        """Merge a batch into the month=YYYY-MM Parquet partitions.
+
+        Each affected month is rewritten with the batch rows winning on
+        (symbol, date), preserving the old INSERT OR REPLACE semantics
+        while date-range queries prune whole months via hive partitioning.
+        """
+        # duckdb 0.9.1 registers datetime64[ns] as TIMESTAMP_NS and cannot
+        # cast that to DATE; hand it plain date objects instead
+        dates = pd.to_datetime(stg['date'])
+        stg = stg.assign(date=dates.dt.date)
+        months = dates.dt.strftime('%Y-%m').unique()
+        self.db.register('stg', stg)
+        try:
+            for month in months:
+                part_dir = os.path.join(self.parquet_dir, f"month={month}")
+                os.makedirs(part_dir, exist_ok=True)
+                part_file = os.path.join(part_dir, 'part.parquet')
+                batch_sql = (
+                    f"SELECT {self._MD_COLS_SQL} FROM stg "
+                    f"WHERE strftime(date, '%Y-%m') = '{month}'"
+                )
+                if os.path.exists(part_file):
+                    # Anti-join first: an idempotent re-ingest of identical
+                    # rows should not rewrite the month's compressed file
+                    changed = self.db.execute(f"""
+                        SELECT count(*) FROM ({batch_sql}) s
+                        LEFT JOIN read_parquet('{part_file}', hive_partitioning=0) m USING (symbol, date)
+                        WHERE m.symbol IS NULL
+                           OR (m.price, m.volume, m.market_cap, m.source, m.is_estimated)
+                              IS DISTINCT FROM (s.price, s.volume, s.market_cap, s.source, s.is_estimated)
+                    """).fetchone()[0]
+                    if not changed:
+                        continue
+                    source_sql = f"""
+                        SELECT symbol, date, price, volume, market_cap, source, is_estimated, timestamp
+                        FROM (
+                            SELECT *, row_number() OVER (PARTITION BY symbol, date ORDER BY priority) AS rn
+                            FROM (
+                                SELECT *, 0 AS priority FROM ({batch_sql})
+                                UNION ALL
+                                -- hive_partitioning off: the month=... path would
+                                -- otherwise add a ninth column and break the UNION
+                                SELECT *, 1 AS priority FROM read_parquet('{part_file}', hive_partitioning=0)
+                            )
+                        ) WHERE rn = 1
+                    """
+                else:
+                    source_sql = batch_sql
+                tmp_file = part_file + '.tmp'
+                self.db.execute(f"""
+                    COPY ({source_sql} ORDER BY symbol, date)
+                    TO '{tmp_file}' (FORMAT PARQUET, COMPRESSION ZSTD)
+                """)
+                os.replace(tmp_file, part_file)
+        finally:
+            self.db.unregister('stg')
+
+    @contextmanager
+    def batch(self):
+        """Group the quality-log writes of a loop into one transaction.
+
+        Daily-data saves go straight to Parquet via COPY + os.replace and
+        are not transactional — a rollback cannot undo them. What the
+        BEGIN/COMMIT still buys is the data_quality inserts: callers that
+        loop log_data_quality over many symbols otherwise pay an
+        auto-commit flush per statement, and flush_quality here streams
+        them out once.
+        """
+        self.db.begin()
+        try:
+            yield self
+        except Exception:
+            self.db.rollback()
+            raise
+        else:
+            self.flush_quality()
+            self.db.commit()
+
+    def _market_cap_key(self) -> str:
+        """Day-bucketed hash key for market caps.
+
+        One hash per day keeps Redis overhead at ~8B per field instead of
+        ~50B per top-level key, and the whole bucket expires together.
+        """
+        return f"market_cap:{datetime.now():%Y%m%d}"
+
     def get_cached_market_cap(self, symbol: str) -> Optional[float]:
-        """Get market cap from Redis cache."""
-        key = f"market_cap:{symbol}"
-        data = self.redis.get(key)
+        """Get market cap from today's Redis hash."""
+        data = self.redis.hget(self._market_cap_key(), symbol)
         if data:
-            return float(data)
+            return struct.unpack('<d', data)[0]
         return None
 
     def set_cached_market_cap(self, symbol: str, value: float):
-        """Cache market cap in Redis."""
-        key = f"market_cap:{symbol}"
-        self.redis.setex(key, self.config.market_cap_ttl, str(value))
-
-    def get_cached_daily_data(self, symbol: str, start_date: datetime, end_date: datetime) -> List[Dict[str, Any]]:
-        """Get daily data from DuckDB."""
-        query = """
-            SELECT symbol, date, price, volume, market_cap, source, is_estimated
-            FROM market_data
-            WHERE symbol = ? AND date BETWEEN ? AND ?
-            ORDER BY date
+        """Cache market cap in today's Redis hash."""
+        key = self._market_cap_key()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(key, symbol, struct.pack('<d', value))
+        pipe.expire(key, self._mcap_ttl)
+        pipe.execute()
+
+    def get_cached_market_caps(self, symbols: List[str]) -> Dict[str, float]:
+        """Get market caps for many symbols in one HMGET round-trip.
+
+        Looping get_cached_market_cap over a universe of hundreds of
+        symbols pays one network RTT each; HMGET collapses them into one.
         """
-        result = self.db.execute(query, [symbol, start_date, end_date]).fetchall()
-        return [dict(zip(['symbol', 'date', 'price', 'volume', 'market_cap', 'source', 'is_estimated'], row)) 
-                for row in result]
+        if not symbols:
+            return {}
+        values = self.redis.hmget(self._market_cap_key(), symbols)
+        return {s: struct.unpack('<d', v)[0] for s, v in zip(symbols, values) if v is not None}
+
+    def set_cached_market_caps(self, mapping: Dict[str, float]):
+        """Cache many market caps via one pipelined round-trip."""
+        if not mapping:
+            return
+        key = self._market_cap_key()
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hset(key, mapping={s: struct.pack('<d', v) for s, v in mapping.items()})
+        pipe.expire(key, self._mcap_ttl)
+        pipe.execute()
+
+    def get_cached_daily_data(self, symbol: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Get daily data from DuckDB as a columnar DataFrame.
+
+        The result stays in column buffers instead of being exploded into
+        one dict per row, which costs N dict + N*7 object allocations.
+        """
+        return self.db.execute(self._SELECT_DAILY_SQL, [symbol, start_date, end_date]).df()
+
+    def get_cached_daily_rows(self, symbol: str, start_date: datetime, end_date: datetime) -> List[tuple]:
+        """Get daily data as plain tuples in _DAILY_COLS order.
+
+        DuckDB already returns tuples from fetchall(); passing them through
+        untouched skips all per-row dict construction for callers that
+        iterate positionally.
+        """
+        return self.db.execute(self._SELECT_DAILY_SQL, [symbol, start_date, end_date]).fetchall()
+
+    def get_cached_daily_data_multi(self, symbols: List[str], start_date: datetime,
+                                    end_date: datetime) -> Dict[str, pd.DataFrame]:
+        """Get daily data for many symbols with a single query.
+
+        One plan with the symbol list bound as a parameter replaces N
+        Python round-trips; DuckDB scans the range once in parallel and
+        the result is split per symbol afterwards.
+        """
+        if not symbols:
+            return {}
+        df = self.db.execute(
+            self._SELECT_DAILY_MULTI_SQL, [list(symbols), start_date, end_date]
+        ).df()
+        return {symbol: group for symbol, group in df.groupby('symbol', sort=False)}
 
     def save_daily_data(self, data: List[Dict[str, Any]]):
         """Save daily data to DuckDB."""
         if not data:
             return
 
-        # Convert to tuple format for batch insert
-        rows = [(
-            d['symbol'],
-            datetime.strptime(d['date'], '%Y-%m-%d') if isinstance(d['date'], str) else d['date'],
-            d['price'],
-            d['volume'],
-            d.get('market_cap', 0),
-            d.get('source', 'unknown'),
-            d.get('is_estimated', False),
-            datetime.now()
-        ) for d in data]
+        # Build the staging frame column-wise: one vectorized to_datetime
+        # over the date column and a single timestamp for the whole batch
+        # replace the per-row strptime/now() calls
+        stg = pd.DataFrame(data, columns=[
+            'symbol', 'date', 'price', 'volume', 'market_cap', 'source', 'is_estimated'
+        ])
+        stg['date'] = pd.to_datetime(stg['date'], format='%Y-%m-%d', cache=True)
+        stg['market_cap'] = stg['market_cap'].fillna(0)
+        stg['source'] = stg['source'].fillna('unknown')
+        stg['is_estimated'] = stg['is_estimated'].fillna(False)
+        stg['timestamp'] = datetime.now()
 
-        self.db.execute("""
-            INSERT OR REPLACE INTO market_data (
-                symbol, date, price, volume, market_cap, source, is_estimated, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        """, rows)
+        # Batches land as ZSTD Parquet partitions: DuckDB reads the staged
+        # columns directly (the Appender API is not exposed to Python) and
+        # the files arrive compressed, so no post-save CHECKPOINT is needed
+        self._write_partitions(stg)
+        self._refresh_market_data_view()
 
     def log_data_quality(self, symbol: str, date: datetime, field: str, source: str, 
                         is_estimated: bool, confidence_score: float):
-        """Log data quality metrics."""
-        self.db.execute("""
-            INSERT OR REPLACE INTO data_quality (
-                symbol, date, field, source, is_estimated, confidence_score, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, [symbol, date, field, source, is_estimated, confidence_score, datetime.now()])
+        """Buffer a data quality record; flushed in batches.
+
+        Quality is logged per (symbol, date, field), so one INSERT per call
+        would dominate ingest time. Appending to a list and flushing in one
+        bulk insert amortizes the SQL parse and bind cost.
+        """
+        self._dq_buffer.append(
+            (symbol, date, field, source, is_estimated, confidence_score)
+        )
+        if len(self._dq_buffer) >= self._dq_flush_threshold:
+            self.flush_quality()
+
+    def flush_quality(self):
+        """Write buffered data quality records to DuckDB in one batch."""
+        if not self._dq_buffer:
+            return
+        stg = pd.DataFrame(self._dq_buffer, columns=[
+            'symbol', 'date', 'field', 'source', 'is_estimated', 'confidence_score'
+        ])
+        # One clock read per flush; a per-append datetime.now() costs a
+        # syscall and an allocation without adding audit precision
+        stg['timestamp'] = datetime.now()
+        # Last write wins within the batch too: the upsert cannot touch
+        # the same key twice, and TIMESTAMP_NS won't cast to DATE
+        stg['date'] = pd.to_datetime(stg['date']).dt.date
+        stg = stg.drop_duplicates(subset=['symbol', 'date', 'field'], keep='last')
+        self._dq_buffer = []
+        self.db.register('dq_stg', stg)
+        try:
+            self.db.execute(self._INSERT_DATA_QUALITY_SQL)
+        finally:
+            self.db.unregister('dq_stg')
+
+    def __del__(self):
+        try:
+            self.flush_quality()
+        except Exception:
+            pass
@@ -9,6 +9,8 @@ from .base import MarketDataProvider
 
 logger = logging.getLogger(__name__)
 
+_MC_MULTIPLIERS = {'T': 1e12, 'B': 1e9, 'M': 1e6, 'K': 1e3}
+
 class AlphaVantageProvider(MarketDataProvider):
     async def _get_market_cap_from_yahoo(self, symbol: str, session: ClientSession) -> Optional[float]:
         """Fallback method to get market cap by scraping Yahoo Finance."""
@@ -30,19 +32,15 @@ class AlphaVantageProvider(MarketDataProvider):
                 market_cap_td = soup.find('td', {'data-test': 'MARKET_CAP-value'})
                 if market_cap_td:
                     mc_text = market_cap_td.text.strip()
-                    # Convert text like "1.23T" to numeric
-                    value = float(''.join(filter(str.isdigit, mc_text[:-1])))
-                    if '.' in mc_text[:-1]:  # Handle decimal points
-                        value = float(mc_text[:-1].replace('T', '').replace('B', '').replace('M', ''))
-                    unit = mc_text[-1].upper()
-                    multiplier = {
-                        'T': 1e12,  # Trillion
-                        'B': 1e9,   # Billion
-                        'M': 1e6    # Million
-                    }.get(unit, 1)
-                    market_cap = value * multiplier
-                    logger.info(f"Fetched market cap for {symbol} from Yahoo Finance: ${market_cap:,.2f}")
-                    return market_cap
+                    # Convert text like "1.23T" to numeric: one float() plus
+                    # a suffix lookup, keeping the decimal intact
+                    try:
+                        market_cap = float(mc_text[:-1]) * _MC_MULTIPLIERS[mc_text[-1].upper()]
+                    except (KeyError, ValueError, IndexError):
+                        market_cap = None
+                    if market_cap:
+                        logger.info(f"Fetched market cap for {symbol} from Yahoo Finance: ${market_cap:,.2f}")
+                        return market_cap
                 
                 # Backup method: look in the JSON-LD data
                 script = soup.find('script', {'type': 'application/ld+json'})
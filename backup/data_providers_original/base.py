@@ -1,30 +1,149 @@
 from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime, timedelta
 import asyncio
+import time
 from abc import ABC, abstractmethod
-from aiohttp import ClientSession, ClientTimeout
+from collections import deque
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+import json
 import logging
 
+# Yahoo chart responses run to megabytes of numeric arrays; orjson's C
+# parser handles them several times faster than stdlib json. Fall back
+# transparently when it is unavailable.
+try:
+    import orjson
+
+    def _json_loads(raw):
+        return orjson.loads(raw)
+except ImportError:
+    def _json_loads(raw):
+        return json.loads(raw)
+
+from functools import lru_cache
+
 from .config import APIConfig
+from .cache import AsyncTTLCache
 
 logger = logging.getLogger(__name__)
 
+
+@lru_cache(maxsize=4096)
+def date_to_timestamp(date_str: str) -> int:
+    """Convert a YYYY-MM-DD string to a Unix timestamp, memoized.
+
+    fromisoformat is a C-level parser (strptime interprets its format
+    string per call), and the same start/end pair repeats across every
+    symbol in a sweep, so the cache amortizes a whole sweep into two
+    parses.
+    """
+    return int(datetime.fromisoformat(date_str).timestamp())
+
+# Quote-style endpoints go stale within a minute; company profiles and
+# historical candles are effectively immutable within a run
+_SHORT_TTL = 60.0
+_LONG_TTL = 6 * 3600.0
+_LONG_TTL_MARKERS = ('profile2', 'OVERVIEW', '/chart/', '/stock/candle')
+
+
+def _cache_ttl_for(url: str) -> float:
+    if any(marker in url for marker in _LONG_TTL_MARKERS):
+        return _LONG_TTL
+    return _SHORT_TTL
+
+
+class _TokenBucket:
+    """Sliding-window rate limiter on the monotonic clock.
+
+    datetime.now() arithmetic is both slower and subject to wall-clock
+    jumps (an NTP step can produce negative waits); monotonic floats
+    cannot go backwards, and the window composes correctly when several
+    coroutines share the provider.
+    """
+
+    def __init__(self, max_rate: int, time_period: float):
+        self.max_rate = max_rate
+        self.time_period = time_period
+        self._ceiling = max_rate
+        self._streak = 0
+        self._grants = deque()
+        self._lock = asyncio.Lock()
+
+    def record_throttle(self):
+        """Halve the window capacity after a 429 (multiplicative decrease)."""
+        self.max_rate = max(1, self.max_rate // 2)
+        self._streak = 0
+
+    def record_success(self):
+        """Creep capacity back toward the configured ceiling.
+
+        One extra token per max_rate consecutive healthy responses —
+        additive increase, so the limiter converges on the server's real
+        limit instead of staying pinned at the post-429 floor.
+        """
+        if self.max_rate >= self._ceiling:
+            return
+        self._streak += 1
+        if self._streak >= self.max_rate:
+            self.max_rate += 1
+            self._streak = 0
+
+    async def acquire(self):
+        async with self._lock:
+            now = time.monotonic()
+            while self._grants and now - self._grants[0] >= self.time_period:
+                self._grants.popleft()
+            if len(self._grants) >= self.max_rate:
+                wait = self.time_period - (now - self._grants[0])
+                await asyncio.sleep(wait)
+                now = time.monotonic()
+                while self._grants and now - self._grants[0] >= self.time_period:
+                    self._grants.popleft()
+            self._grants.append(time.monotonic())
+
+
 class MarketDataProvider(ABC):
     def __init__(self, config: APIConfig):
         self.config = config
-        self.last_request_time = {}
+        self._limiter = _TokenBucket(config.requests_per_minute, 60.0)
         self.request_semaphore = asyncio.Semaphore(1)
+        self._session: Optional[ClientSession] = None
+        self._cache = AsyncTTLCache(maxsize=10000)
+
+    async def _get_session(self) -> ClientSession:
+        """Return the provider's shared session, creating it on first use.
+
+        One session per provider keeps the TCP connection pool and TLS
+        keep-alives alive across calls instead of paying a handshake per
+        request.
+        """
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(
+                    limit=100,
+                    limit_per_host=20,
+                    ttl_dns_cache=300,
+                    keepalive_timeout=60
+                )
+            )
+        return self._session
+
+    async def close(self):
+        """Close the shared session if one was created."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        await self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
 
     async def _wait_for_rate_limit(self, endpoint: str):
-        """Implements rate limiting for API requests."""
-        now = datetime.now()
-        if endpoint in self.last_request_time:
-            last_request = self.last_request_time[endpoint]
-            time_since_last = (now - last_request).total_seconds()
-            min_interval = 60 / self.config.requests_per_minute
-            if time_since_last < min_interval:
-                await asyncio.sleep(min_interval - time_since_last)
-        self.last_request_time[endpoint] = now
+        """Acquire a token from the provider's shared rate limiter."""
+        await self._limiter.acquire()
 
     @abstractmethod
     async def get_market_cap(self, symbol: str, session: ClientSession) -> Optional[float]:
@@ -37,16 +156,73 @@ class MarketDataProvider(ABC):
         """Get daily price and volume data."""
         pass
 
-    async def _make_request(self, session: ClientSession, url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Make a rate-limited API request with retries."""
+    async def get_market_cap_many(self, symbols: List[str],
+                                  session: Optional[ClientSession] = None) -> Dict[str, Optional[float]]:
+        """Fetch market caps for many symbols concurrently.
+
+        Overlaps the HTTP round trips behind a semaphore; the token
+        bucket still meters actual dispatch, so concurrency rises
+        without exceeding the provider's rate limit.
+        """
+        sem = asyncio.Semaphore(self.config.requests_per_minute)
+
+        async def one(symbol: str):
+            async with sem:
+                return symbol, await self.get_market_cap(symbol, session)
+
+        return dict(await asyncio.gather(*(one(s) for s in symbols)))
+
+    async def get_company_info_many(self, symbols: List[str],
+                                    session: Optional[ClientSession] = None) -> Dict[str, Dict[str, Any]]:
+        """Fetch company info for many symbols concurrently."""
+        sem = asyncio.Semaphore(self.config.requests_per_minute)
+
+        async def one(symbol: str):
+            async with sem:
+                return symbol, await self.get_company_info(symbol, session)
+
+        return dict(await asyncio.gather(*(one(s) for s in symbols)))
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Return hit/miss counters for the provider's response cache."""
+        return self._cache.stats()
+
+    async def _make_request(self, session: Optional[ClientSession], url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Make a rate-limited API request, answering repeats from cache."""
+        key = (url, tuple(sorted(params.items())))
+
+        async def fetch():
+            return await self._dispatch_request(session, url, params)
+
+        return await self._cache.get_or_fetch(key, fetch, _cache_ttl_for(url))
+
+    async def _dispatch_request(self, session: Optional[ClientSession], url: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Send the actual rate-limited GET for a cache miss."""
         try:
+            if session is None:
+                session = await self._get_session()
             async with self.request_semaphore:
                 await self._wait_for_rate_limit(url)
                 async with session.get(url, params=params, timeout=ClientTimeout(total=30)) as response:
                     if response.status == 429:
                         logger.warning(f"Rate limit hit for {url}")
+                        self._limiter.record_throttle()
+                        retry_after = response.headers.get("Retry-After")
+                        if retry_after is not None:
+                            try:
+                                delay = min(float(retry_after), 60.0)
+                            except ValueError:
+                                delay = 0.0
+                            if delay > 0:
+                                await asyncio.sleep(delay)
                         return None
-                    return await response.json()
+                    remaining = response.headers.get("x-ratelimit-remaining-requests")
+                    if remaining is not None and remaining.isdigit() and int(remaining) <= 1:
+                        # Nearly out of quota: pause briefly rather than
+                        # provoking the 429 round trip
+                        await asyncio.sleep(1.0)
+                    self._limiter.record_success()
+                    return _json_loads(await response.read())
         except Exception as e:
             logger.error(f"API request failed: {str(e)}")
             return None
@@ -0,0 +1,108 @@
+from typing import Any, Callable, Dict, Hashable, Optional
+import asyncio
+import functools
+import time
+from collections import OrderedDict
+
+
+class AsyncTTLCache:
+    """In-memory TTL + LRU cache with in-flight request merging.
+
+    Provider endpoints like market cap and company profile are pure
+    functions of (symbol, day), so repeated index rebuilds can answer
+    from memory instead of burning rate-limit quota on identical GETs.
+    Entries expire after a per-entry TTL and the least recently used
+    entry is evicted once maxsize is reached. Concurrent lookups for the
+    same key share one fetch via a per-key lock, so a burst of requests
+    for a cold key costs a single network call.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.inflight_merges = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if absent/expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        """Store value under key for ttl seconds, evicting LRU overflow."""
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable, ttl: float) -> Optional[Any]:
+        """Return the cached value or fetch it, merging duplicate in-flight calls.
+
+        fetch is an argument-less coroutine function; a None result is
+        treated as a failed fetch and not cached, so transient errors
+        retry on the next call.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        if lock.locked():
+            self.inflight_merges += 1
+        async with lock:
+            # A merged waiter finds the value the first caller stored
+            value = self.get(key)
+            if value is None:
+                value = await fetch()
+                if value is not None:
+                    self.set(key, value, ttl)
+            self._locks.pop(key, None)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/merge counters and the current entry count."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "inflight_merges": self.inflight_merges,
+            "size": len(self._data)
+        }
+
+
+def async_ttl_cached(ttl: float, key: Callable):
+    """Memoize an async method through a private AsyncTTLCache.
+
+    key maps the call arguments to a cache key. Falsy results (None, {})
+    are returned but not stored, so a transient failure does not pin an
+    empty answer for the full TTL.
+    """
+    def decorator(func):
+        cache = AsyncTTLCache(maxsize=10000)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            value = cache.get(cache_key)
+            if value is not None:
+                return value
+            value = await func(*args, **kwargs)
+            if value:
+                cache.set(cache_key, value, ttl)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
@@ -1,7 +1,11 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import aiohttp
-from .base import BaseDataProvider
+import numpy as np
+import pandas as pd
+from .base import BaseDataProvider, date_to_timestamp
+from .cache import async_ttl_cached
+from .hist_cache import HistoricalCache
 from ..config import APIConfig
 
 class FinnhubProvider(BaseDataProvider):
@@ -12,8 +16,9 @@ class FinnhubProvider(BaseDataProvider):
             base_delay=APIConfig.FINNHUB["base_delay"]
         )
         self.base_url = APIConfig.FINNHUB["base_url"]
+        self._hist_cache = HistoricalCache('finnhub')
 
-    async def get_market_cap(self, symbol: str, session: aiohttp.ClientSession) -> Optional[float]:
+    async def get_market_cap(self, symbol: str, session: Optional[aiohttp.ClientSession] = None) -> Optional[float]:
         """Get market cap for a symbol from Finnhub."""
         try:
             params = {
@@ -34,11 +39,18 @@ class FinnhubProvider(BaseDataProvider):
             print(f"Error getting market cap from Finnhub for {symbol}: {str(e)}")
             return None
 
-    async def get_stock_data(self, symbol: str, start_date: str, end_date: str, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+    async def get_stock_data(self, symbol: str, start_date: str, end_date: str, session: Optional[aiohttp.ClientSession] = None) -> List[Dict[str, Any]]:
         """Get historical stock data from Finnhub."""
         try:
-            start_timestamp = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
-            end_timestamp = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp())
+            # Past candles are immutable: answer from the per-symbol
+            # Parquet cache and only fetch the dates past its tail
+            cached = self._hist_cache.load(symbol)
+            fetch_from = self._hist_cache.fetch_start(cached, start_date, end_date)
+            if fetch_from is None:
+                return self._hist_cache.slice_records(cached, start_date, end_date)
+
+            start_timestamp = date_to_timestamp(fetch_from)
+            end_timestamp = date_to_timestamp(end_date)
             
             params = {
                 "symbol": symbol,
@@ -55,24 +67,34 @@ class FinnhubProvider(BaseDataProvider):
                 "finnhub_candles"
             )
             
+            records = []
             if data and data.get("s") == "ok":
-                result = []
-                for i in range(len(data["t"])):
-                    date = datetime.fromtimestamp(data["t"][i]).strftime("%Y-%m-%d")
-                    result.append({
+                # One vectorized timestamp conversion and typed casts for
+                # the whole candle array instead of a Python datetime
+                # round-trip per element
+                dates = pd.to_datetime(np.asarray(data["t"], dtype="int64"), unit="s").strftime("%Y-%m-%d")
+                prices = np.asarray(data["c"], dtype="float64")
+                volumes = np.asarray(data["v"], dtype="int64")
+                records = [
+                    {
                         "date": date,
                         "symbol": symbol,
-                        "price": float(data["c"][i]),  # Close price
-                        "volume": int(data["v"][i]),
+                        "price": price,  # Close price
+                        "volume": volume,
                         "market_cap": 0  # Will be filled later
-                    })
-                return result
-            return []
+                    }
+                    for date, price, volume in zip(dates.tolist(), prices.tolist(), volumes.tolist())
+                ]
+            merged = self._hist_cache.update(symbol, cached, records)
+            return self._hist_cache.slice_records(merged, start_date, end_date)
         except Exception as e:
             print(f"Error getting stock data from Finnhub for {symbol}: {str(e)}")
             return []
 
-    async def get_company_info(self, symbol: str, session: aiohttp.ClientSession) -> Dict[str, Any]:
+    # Company metadata changes on the order of days, so a day-long
+    # memo collapses the per-rebuild refetch into one call per symbol
+    @async_ttl_cached(ttl=86400, key=lambda self, symbol, session=None: symbol)
+    async def get_company_info(self, symbol: str, session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
         """Get company information from Finnhub."""
         try:
             params = {
@@ -0,0 +1,69 @@
+from typing import Any, Dict, List, Optional
+import os
+
+import pandas as pd
+
+_COLUMNS = ['date', 'symbol', 'price', 'volume', 'market_cap']
+
+
+class HistoricalCache:
+    """One Parquet file per symbol holding immutable daily history.
+
+    Past OHLCV rows never change, so a provider only needs the network
+    for dates beyond the cached tail; everything earlier is answered by
+    a local Parquet read instead of an HTTP round trip plus JSON parse.
+    """
+
+    def __init__(self, provider: str, cache_dir: str = "cache"):
+        self.cache_dir = os.path.join(cache_dir, provider)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, symbol: str) -> str:
+        return os.path.join(self.cache_dir, f"{symbol}.parquet")
+
+    def load(self, symbol: str) -> Optional[pd.DataFrame]:
+        """Return the cached frame for a symbol, or None when absent."""
+        path = self._path(symbol)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception:
+            # A corrupt file just means a full refetch
+            return None
+
+    @staticmethod
+    def fetch_start(cached: Optional[pd.DataFrame], start_date: str, end_date: str) -> Optional[str]:
+        """Return the first date that still needs fetching, or None.
+
+        None means the cache already covers the requested window, so the
+        caller can skip the network entirely.
+        """
+        if cached is None or cached.empty:
+            return start_date
+        last = str(cached['date'].max())
+        if last >= end_date:
+            return None
+        next_day = (pd.Timestamp(last) + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+        return max(next_day, start_date)
+
+    def update(self, symbol: str, cached: Optional[pd.DataFrame],
+               records: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Merge freshly fetched records into the cache, returning the union."""
+        if not records:
+            return cached if cached is not None else pd.DataFrame(columns=_COLUMNS)
+        fresh = pd.DataFrame(records, columns=_COLUMNS)
+        merged = fresh if cached is None else pd.concat([cached, fresh], ignore_index=True)
+        merged = merged.drop_duplicates(subset='date', keep='last').sort_values('date', ignore_index=True)
+        tmp_path = self._path(symbol) + '.tmp'
+        merged.to_parquet(tmp_path, compression='zstd')
+        os.replace(tmp_path, self._path(symbol))
+        return merged
+
+    @staticmethod
+    def slice_records(df: Optional[pd.DataFrame], start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """Return the rows within [start_date, end_date] as record dicts."""
+        if df is None or df.empty:
+            return []
+        mask = (df['date'] >= start_date) & (df['date'] <= end_date)
+        return df.loc[mask].to_dict('records')
@@ -1,11 +1,16 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import aiohttp
-from bs4 import BeautifulSoup
-import json
-from .base import BaseDataProvider
+import numpy as np
+import pandas as pd
+import lxml.html
+from .base import BaseDataProvider, date_to_timestamp, _json_loads
+from .cache import async_ttl_cached
+from .hist_cache import HistoricalCache
 from ..config import APIConfig
 
+_MC_MULTIPLIERS = {'T': 1e12, 'B': 1e9, 'M': 1e6, 'K': 1e3}
+
 class YahooFinanceProvider(BaseDataProvider):
     def __init__(self):
         super().__init__(
@@ -14,13 +19,16 @@ class YahooFinanceProvider(BaseDataProvider):
             base_delay=APIConfig.YAHOO_FINANCE["base_delay"]
         )
         self.base_url = APIConfig.YAHOO_FINANCE["base_url"]
+        self._hist_cache = HistoricalCache('yahoo_finance')
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
 
-    async def get_market_cap(self, symbol: str, session: aiohttp.ClientSession) -> Optional[float]:
+    async def get_market_cap(self, symbol: str, session: Optional[aiohttp.ClientSession] = None) -> Optional[float]:
         """Get market cap for a symbol from Yahoo Finance."""
         try:
+            if session is None:
+                session = await self._get_session()
             async with session.get(f"https://finance.yahoo.com/quote/{symbol}", 
                                  headers=self.headers,
                                  timeout=aiohttp.ClientTimeout(total=30)) as response:
@@ -28,27 +36,32 @@ class YahooFinanceProvider(BaseDataProvider):
                     return None
                     
                 html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
+                doc = lxml.html.fromstring(html)
                 
                 # Try to find market cap in the page
-                market_cap_td = soup.find('td', {'data-test': 'MARKET_CAP-value'})
+                market_cap_td = doc.xpath('//td[@data-test="MARKET_CAP-value"]')
                 if market_cap_td:
-                    mc_text = market_cap_td.text.strip()
-                    # Convert text like "1.23T" to numeric
-                    value = float(''.join(filter(str.isdigit, mc_text[:-1])))
-                    unit = mc_text[-1].upper()
-                    multiplier = {'B': 1e9, 'M': 1e6, 'T': 1e12}.get(unit, 1)
-                    return value * multiplier
+                    mc_text = market_cap_td[0].text_content().strip()
+                    # Convert text like "1.23T" to numeric: one float() plus
+                    # a suffix lookup, keeping the decimal intact. Plain
+                    # numbers without a suffix parse as-is.
+                    mult = _MC_MULTIPLIERS.get(mc_text[-1].upper()) if mc_text else None
+                    try:
+                        value = float(mc_text[:-1]) if mult else float(mc_text.replace(',', ''))
+                    except ValueError:
+                        pass
+                    else:
+                        return value * (mult or 1.0)
                 
                 # Backup: look in the JSON-LD data
-                script = soup.find('script', {'type': 'application/ld+json'})
+                script = doc.xpath('//script[@type="application/ld+json"]/text()')
                 if script:
                     try:
-                        data = json.loads(script.string)
+                        data = _json_loads(script[0])
                         market_cap = float(data.get('marketCap', 0))
                         if market_cap > 0:
                             return market_cap
-                    except (json.JSONDecodeError, ValueError, TypeError):
+                    except (ValueError, TypeError):
                         pass
                 
                 return None
@@ -56,11 +69,18 @@ class YahooFinanceProvider(BaseDataProvider):
             print(f"Error getting market cap from Yahoo Finance for {symbol}: {str(e)}")
             return None
 
-    async def get_stock_data(self, symbol: str, start_date: str, end_date: str, session: aiohttp.ClientSession) -> List[Dict[str, Any]]:
+    async def get_stock_data(self, symbol: str, start_date: str, end_date: str, session: Optional[aiohttp.ClientSession] = None) -> List[Dict[str, Any]]:
         """Get historical stock data from Yahoo Finance."""
         try:
-            start_timestamp = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
-            end_timestamp = int(datetime.strptime(end_date, "%Y-%m-%d").timestamp())
+            # Past candles are immutable: answer from the per-symbol
+            # Parquet cache and only fetch the dates past its tail
+            cached = self._hist_cache.load(symbol)
+            fetch_from = self._hist_cache.fetch_start(cached, start_date, end_date)
+            if fetch_from is None:
+                return self._hist_cache.slice_records(cached, start_date, end_date)
+
+            start_timestamp = date_to_timestamp(fetch_from)
+            end_timestamp = date_to_timestamp(end_date)
             
             params = {
                 "symbol": symbol,
@@ -73,32 +93,47 @@ class YahooFinanceProvider(BaseDataProvider):
             url = f"https://query1.finance.yahoo.com/v8/finance/chart/{symbol}"
             data = await self.make_request(session, url, params, "yahoo_chart")
             
+            records = []
             if data and "chart" in data and "result" in data["chart"]:
                 result = data["chart"]["result"][0]
                 timestamps = result["timestamp"]
                 quotes = result["indicators"]["quote"][0]
                 
-                stock_data = []
-                for i in range(len(timestamps)):
-                    if (quotes["close"][i] is not None and 
-                        quotes["volume"][i] is not None):
-                        date = datetime.fromtimestamp(timestamps[i]).strftime("%Y-%m-%d")
-                        stock_data.append({
-                            "date": date,
-                            "symbol": symbol,
-                            "price": float(quotes["close"][i]),
-                            "volume": int(quotes["volume"][i]),
-                            "market_cap": 0  # Will be filled later
-                        })
-                return stock_data
-            return []
+                # None entries become NaN in the float cast, so one mask
+                # replaces the per-row is-not-None checks and the dates
+                # convert in a single vectorized pass
+                closes = np.array(quotes["close"], dtype="float64")
+                volumes = np.array(quotes["volume"], dtype="float64")
+                valid = ~(np.isnan(closes) | np.isnan(volumes))
+                dates = pd.to_datetime(np.asarray(timestamps, dtype="int64")[valid], unit="s").strftime("%Y-%m-%d")
+                records = [
+                    {
+                        "date": date,
+                        "symbol": symbol,
+                        "price": price,
+                        "volume": volume,
+                        "market_cap": 0  # Will be filled later
+                    }
+                    for date, price, volume in zip(
+                        dates.tolist(),
+                        closes[valid].tolist(),
+                        volumes[valid].astype("int64").tolist()
+                    )
+                ]
+            merged = self._hist_cache.update(symbol, cached, records)
+            return self._hist_cache.slice_records(merged, start_date, end_date)
         except Exception as e:
             print(f"Error getting stock data from Yahoo Finance for {symbol}: {str(e)}")
             return []
 
-    async def get_company_info(self, symbol: str, session: aiohttp.ClientSession) -> Dict[str, Any]:
+    # Company metadata changes on the order of days, so a day-long
+    # memo collapses the per-rebuild refetch into one call per symbol
+    @async_ttl_cached(ttl=86400, key=lambda self, symbol, session=None: symbol)
+    async def get_company_info(self, symbol: str, session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
         """Get company information from Yahoo Finance."""
         try:
+            if session is None:
+                session = await self._get_session()
             async with session.get(f"https://finance.yahoo.com/quote/{symbol}/profile",
                                  headers=self.headers,
                                  timeout=aiohttp.ClientTimeout(total=30)) as response:
@@ -106,21 +141,23 @@ class YahooFinanceProvider(BaseDataProvider):
                     return {}
                 
                 html = await response.text()
-                soup = BeautifulSoup(html, 'html.parser')
+                doc = lxml.html.fromstring(html)
                 
                 name = ""
                 industry = ""
                 
                 # Try to get company name
-                name_h1 = soup.find('h1', {'class': 'D(ib)'})
+                name_h1 = doc.xpath('//h1[contains(@class, "D(ib)")]')
                 if name_h1:
-                    name = name_h1.text.strip()
+                    name = name_h1[0].text_content().strip()
                 
                 # Try to get industry
-                spans = soup.find_all('span', {'class': 'Fw(600)'})
+                spans = doc.xpath('//span[contains(@class, "Fw(600)")]')
                 for span in spans:
-                    if 'Industry' in span.text:
-                        industry = span.find_next_sibling('span').text.strip()
+                    if 'Industry' in span.text_content():
+                        sibling = span.getnext()
+                        if sibling is not None and sibling.tag == 'span':
+                            industry = sibling.text_content().strip()
                         break
                 
                 market_cap = await self.get_market_cap(symbol, session)
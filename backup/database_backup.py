@@ -1,4 +1,6 @@
+import asyncio
 import duckdb
+import pandas as pd
 from pathlib import Path
 
 class Database:
@@ -52,87 +54,122 @@ class Database:
             )
         """)
 
+        # Range scans in build_index skip row groups via the date index;
+        # the composite one supports the per-day top-100 ranking
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_market_data_date
+            ON market_data (date)
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_market_data_date_mcap
+            ON market_data (date, market_cap)
+        """)
+
     def insert_market_data(self, data: list[dict]):
         """Insert market data into the database."""
         if not data:
             return
-            
-        # Convert data to list of tuples for bulk insert
-        values = [(
-            d['date'],
-            d['symbol'],
-            d['price'],
-            d['market_cap'],
-            d['volume']
-        ) for d in data]
-        
-        # First delete any existing data for these dates and symbols
-        existing_data = [(d['date'], d['symbol']) for d in data]
-        if existing_data:
+
+        # Register a DataFrame and let DuckDB consume it columnar —
+        # one bulk copy instead of a parameter binding per row
+        df = pd.DataFrame(data, columns=['date', 'symbol', 'price', 'market_cap', 'volume'])
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        df['volume'] = df['volume'].astype('int64')
+        # Date-sorted batches keep DuckDB's row-group zonemaps tight, so
+        # range scans can skip blocks outside the queried window
+        df = df.sort_values('date', ignore_index=True)
+
+        self.conn.register('tmp_market_data', df)
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            # First delete any existing data for these dates and symbols.
+            # USING gives the optimizer a proper relation to hash
+            # semi-join against, rather than a row-tuple IN subquery
             self.conn.execute("""
-                DELETE FROM market_data 
-                WHERE (date, symbol) IN (
-                    SELECT UNNEST(?), UNNEST(?)
-                )
-            """, [
-                [d[0] for d in existing_data],
-                [d[1] for d in existing_data]
-            ])
-        
-        # Then insert new data
-        self.conn.execute("""
-            INSERT INTO market_data (date, symbol, price, market_cap, volume)
-            VALUES (?, ?, ?, ?, ?)
-        """, values)
+                DELETE FROM market_data m
+                USING tmp_market_data t
+                WHERE m.date = t.date AND m.symbol = t.symbol
+            """)
+            # Then insert new data
+            self.conn.execute("""
+                INSERT INTO market_data (date, symbol, price, market_cap, volume)
+                SELECT date, symbol, price, market_cap, volume FROM tmp_market_data
+            """)
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        finally:
+            self.conn.unregister('tmp_market_data')
+
+    async def insert_market_data_async(self, data: list[dict]):
+        """Insert market data from a worker thread.
+
+        DuckDB releases the GIL inside its engine, so running the insert
+        via asyncio.to_thread lets the event loop keep draining HTTP
+        responses while ingest proceeds.
+        """
+        await asyncio.to_thread(self.insert_market_data, data)
 
     def build_index(self, start_date: str, end_date: str):
         """Build the index for the given date range."""
-        # First, clear existing constituents for this date range
-        self.conn.execute("""
-            DELETE FROM index_constituents 
-            WHERE date BETWEEN ? AND ?
-        """, [start_date, end_date])
-        
-        # Then identify top 100 stocks by market cap for each day
-        self.conn.execute("""
-            WITH ranked_stocks AS (
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+
+            # First, clear existing constituents for this date range
+            self.conn.execute("""
+                DELETE FROM index_constituents 
+                WHERE date BETWEEN ? AND ?
+            """, [start_date, end_date])
+            
+            # Then identify top 100 stocks by market cap for each day.
+            # QUALIFY fuses the rank filter into the window, so DuckDB
+            # keeps a 100-row top-K per day instead of materializing and
+            # sorting every row in the range
+            self.conn.execute("""
+                INSERT INTO index_constituents (date, symbol, weight, rank)
+                WITH ranked_stocks AS (
+                    SELECT 
+                        date,
+                        symbol,
+                        market_cap,
+                        ROW_NUMBER() OVER (PARTITION BY date ORDER BY market_cap DESC) as rank
+                    FROM market_data
+                    WHERE date BETWEEN ? AND ?
+                    QUALIFY rank <= 100
+                )
                 SELECT 
                     date,
                     symbol,
-                    market_cap,
-                    ROW_NUMBER() OVER (PARTITION BY date ORDER BY market_cap DESC) as rank
-                FROM market_data
-                WHERE date BETWEEN ? AND ?
-            )
-            INSERT INTO index_constituents (date, symbol, weight, rank)
-            SELECT 
-                date,
-                symbol,
-                1.0/COUNT(*) OVER (PARTITION BY date) as weight,  -- Equal weighting
-                rank
-            FROM ranked_stocks
-            WHERE rank <= 100
-        """, [start_date, end_date])
+                    1.0/COUNT(*) OVER (PARTITION BY date) as weight,  -- Equal weighting
+                    rank
+                FROM ranked_stocks
+            """, [start_date, end_date])
 
-        # Calculate daily returns
-        self.conn.execute("""
-            WITH daily_index_return AS (
+            # Calculate daily returns
+            self.conn.execute("""
+                WITH daily_index_return AS (
+                    SELECT 
+                        m.date,
+                        SUM(ic.weight * 
+                            (m.price / LAG(m.price) OVER (PARTITION BY m.symbol ORDER BY m.date) - 1)
+                        ) as daily_return
+                    FROM index_constituents ic
+                    JOIN market_data m ON ic.date = m.date AND ic.symbol = m.symbol
+                    GROUP BY m.date
+                )
+                INSERT INTO index_performance (date, daily_return, cumulative_return)
                 SELECT 
-                    m.date,
-                    SUM(ic.weight * 
-                        (m.price / LAG(m.price) OVER (PARTITION BY m.symbol ORDER BY m.date) - 1)
-                    ) as daily_return
-                FROM index_constituents ic
-                JOIN market_data m ON ic.date = m.date AND ic.symbol = m.symbol
-                GROUP BY m.date
-            )
-            INSERT INTO index_performance (date, daily_return, cumulative_return)
-            SELECT 
-                date,
-                daily_return,
-                EXP(SUM(LN(1 + COALESCE(daily_return, 0))) OVER (ORDER BY date)) - 1 as cumulative_return
-            FROM daily_index_return
-        """)
+                    date,
+                    daily_return,
+                    EXP(SUM(LN(1 + COALESCE(daily_return, 0))) OVER (ORDER BY date)) - 1 as cumulative_return
+                FROM daily_index_return
+            """)
+
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
 
     def track_composition_changes(self, date: str):
         """Track changes in index composition."""
@@ -163,6 +200,60 @@ class Database:
             WHERE symbol NOT IN (SELECT symbol FROM curr_constituents)
         """, [date, date, date, date])
 
+    def track_composition_changes_range(self, start_date: str, end_date: str):
+        """Track composition changes for every day in a date range.
+
+        One set-based statement replaces a round trip per day: the
+        current and previous constituent sets for all days in the range
+        join once, and anti-joins produce the ENTRY and EXIT rows.
+        """
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            self.conn.execute("""
+                DELETE FROM composition_changes
+                WHERE date BETWEEN ? AND ?
+            """, [start_date, end_date])
+            self.conn.execute("""
+                INSERT INTO composition_changes (date, symbol, change_type)
+                WITH dates AS (
+                    SELECT UNNEST(generate_series(CAST(? AS DATE), CAST(? AS DATE), INTERVAL 1 DAY))::DATE AS date
+                ),
+                curr AS (
+                    SELECT d.date, ic.symbol
+                    FROM dates d
+                    JOIN index_constituents ic ON ic.date = d.date
+                ),
+                prev AS (
+                    SELECT d.date, ic.symbol
+                    FROM dates d
+                    JOIN index_constituents ic ON ic.date = d.date - 1
+                )
+                SELECT c.date, c.symbol, 'ENTRY' AS change_type
+                FROM curr c
+                ANTI JOIN prev p ON p.date = c.date AND p.symbol = c.symbol
+                UNION ALL
+                SELECT p.date, p.symbol, 'EXIT' AS change_type
+                FROM prev p
+                ANTI JOIN curr c ON c.date = p.date AND c.symbol = p.symbol
+            """, [start_date, end_date])
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def has_data(self, start_date: str, end_date: str) -> bool:
+        """Check whether any market data exists for a date range.
+
+        A LIMIT 1 existence probe instead of pulling a full rowset just
+        to test emptiness.
+        """
+        row = self.conn.execute("""
+            SELECT 1 FROM market_data
+            WHERE date BETWEEN ? AND ?
+            LIMIT 1
+        """, [start_date, end_date]).fetchone()
+        return row is not None
+
     def get_performance(self, start_date: str, end_date: str) -> list[dict]:
         """Retrieve index performance for a date range."""
         return self.conn.execute("""
@@ -201,6 +292,26 @@ class Database:
             ORDER BY date, change_type
         """, [start_date, end_date]).fetchall()
 
+    def get_export_bundle(self, start_date: str, end_date: str) -> dict:
+        """Fetch performance, composition, and changes in one call.
+
+        The export needs all three result sets; running them inside a
+        single transaction on one connection round trip lets DuckDB
+        reuse its buffers across the overlapping tables.
+        """
+        try:
+            self.conn.execute("BEGIN TRANSACTION")
+            bundle = {
+                'performance': self.get_performance(start_date, end_date),
+                'composition': self.get_composition(end_date),
+                'changes': self.get_composition_changes(start_date, end_date)
+            }
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return bundle
+
     def close(self):
         """Close the database connection."""
         self.conn.close()
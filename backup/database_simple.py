@@ -1,3 +1,4 @@
+import asyncio
 import duckdb
 import pandas as pd
 from typing import List, Dict, Any
@@ -36,6 +37,17 @@ class Database:
             )
         """)
 
+        # Speeds up the date-range scans in calculate_index_performance
+        # and the per-day market-cap ranking in get_top_companies
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_market_data_date
+            ON market_data (date)
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_market_data_date_mcap
+            ON market_data (date, market_cap)
+        """)
+
     def insert_market_data(self, data: List[Dict[str, Any]]):
         """Insert market data into the database."""
         if not data:
@@ -44,20 +56,58 @@ class Database:
         try:
             df = pd.DataFrame(data)
             
-            # Clean data
-            df = df.dropna(subset=['date', 'symbol', 'price'])
-            df['market_cap'] = df['market_cap'].fillna(0)
-            df['volume'] = df['volume'].fillna(0)
-            
-            # Insert using DuckDB
-            self.conn.execute("DELETE FROM market_data WHERE date IN (SELECT DISTINCT date FROM df)")
-            self.conn.execute("INSERT INTO market_data SELECT * FROM df")
+            # Register the frame explicitly instead of relying on the
+            # stack-frame replacement scan. The cleaning that used to be
+            # dropna/fillna passes (each a Python-side column copy) now
+            # happens in DuckDB's vectorized engine during the INSERT,
+            # and ORDER BY date keeps the row-group zonemaps tight.
+            self.conn.register('df_md', df)
+            try:
+                self.conn.execute("BEGIN TRANSACTION")
+                self.conn.execute("DELETE FROM market_data WHERE date IN (SELECT DISTINCT date FROM df_md)")
+                self.conn.execute("""
+                    INSERT INTO market_data
+                    SELECT date, symbol, price,
+                           COALESCE(market_cap, 0) AS market_cap,
+                           COALESCE(volume, 0) AS volume
+                    FROM df_md
+                    WHERE date IS NOT NULL AND symbol IS NOT NULL AND price IS NOT NULL
+                    ORDER BY date
+                """)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            finally:
+                self.conn.unregister('df_md')
             
             logger.info(f"Inserted {len(df)} market data records")
             
         except Exception as e:
             logger.error(f"Error inserting market data: {str(e)}")
 
+    async def insert_market_data_async(self, data: List[Dict[str, Any]]):
+        """Insert market data from a worker thread.
+
+        DuckDB releases the GIL inside its engine, so running the insert
+        via asyncio.to_thread keeps the event loop free for concurrent
+        fetches instead of blocking it on the write.
+        """
+        await asyncio.to_thread(self.insert_market_data, data)
+
+    def has_data(self, start_date: str, end_date: str) -> bool:
+        """Check whether any market data exists for a date range.
+
+        A LIMIT 1 existence probe instead of pulling a full rowset just
+        to test emptiness.
+        """
+        row = self.conn.execute("""
+            SELECT 1 FROM market_data
+            WHERE date BETWEEN ? AND ?
+            LIMIT 1
+        """, [start_date, end_date]).fetchone()
+        return row is not None
+
     def calculate_index_performance(self, start_date: str, end_date: str) -> pd.DataFrame:
         """Calculate market cap weighted index performance."""
         try:
@@ -98,7 +148,8 @@ class Database:
             logger.error(f"Error calculating index performance: {str(e)}")
             return pd.DataFrame()
 
-    def get_market_data(self, start_date: str, end_date: str, symbols: List[str] = None) -> pd.DataFrame:
+    def get_market_data(self, start_date: str, end_date: str, symbols: List[str] = None,
+                        limit: int = None) -> pd.DataFrame:
         """Get market data for specified date range and symbols."""
         try:
             base_query = """
@@ -115,6 +166,13 @@ class Database:
             
             base_query += " ORDER BY date, symbol"
             
+            # Pushing the limit into SQL lets DuckDB stop scanning once
+            # it has enough rows, instead of materializing the full range
+            # and truncating in Python
+            if limit is not None:
+                base_query += " LIMIT ?"
+                params.append(limit)
+            
             result = self.conn.execute(base_query, params).fetchdf()
             return result
             
@@ -146,13 +204,21 @@ class Database:
             if performance_data.empty:
                 return
                 
-            # Delete existing data for the date range
-            dates = performance_data['date'].tolist()
-            placeholders = ','.join(['?' for _ in dates])
-            self.conn.execute(f"DELETE FROM index_performance WHERE date IN ({placeholders})", dates)
-            
-            # Insert new data
-            self.conn.execute("INSERT INTO index_performance SELECT * FROM performance_data")
+            # One registered frame drives both the delete and the
+            # insert, so the statements stay fixed and DuckDB can reuse
+            # their plans instead of compiling a new IN (...) list per
+            # batch size
+            self.conn.register('df_perf', performance_data)
+            try:
+                self.conn.execute("BEGIN TRANSACTION")
+                self.conn.execute("DELETE FROM index_performance WHERE date IN (SELECT date FROM df_perf)")
+                self.conn.execute("INSERT INTO index_performance SELECT * FROM df_perf")
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            finally:
+                self.conn.unregister('df_perf')
             
             logger.info(f"Saved {len(performance_data)} index performance records")
             
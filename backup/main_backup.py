@@ -1,11 +1,18 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 import redis
+import openpyxl
+import orjson
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
-import json
+import asyncio
+import hashlib
+import io
 import os
+import time
+import zipfile
+import zlib
 from pathlib import Path
 from dotenv import load_dotenv
 
@@ -23,31 +30,173 @@ from .data_fetcher_simple import DataFetcher
 
 app = FastAPI(title="Stock Index Service")
 
+class RedisGate:
+    """Circuit breaker around the Redis client.
+
+    Without it a Redis outage costs every request a connect attempt and
+    its timeout before falling back to the database. The first
+    RedisError opens the circuit for probe_interval seconds; while
+    open, all calls short-circuit to a miss/no-op, and the first call
+    after the window doubles as the health probe.
+    """
+
+    def __init__(self, client, probe_interval: float = 30.0):
+        self._client = client
+        self._probe_interval = probe_interval
+        self._healthy = client is not None
+        self._next_probe_at = 0.0
+
+    def _available(self) -> bool:
+        if self._client is None:
+            return False
+        return self._healthy or time.monotonic() >= self._next_probe_at
+
+    def _trip(self):
+        self._healthy = False
+        self._next_probe_at = time.monotonic() + self._probe_interval
+
+    def get(self, key):
+        if not self._available():
+            return None
+        try:
+            value = self._client.get(key)
+            self._healthy = True
+            return value
+        except redis.exceptions.RedisError:
+            self._trip()
+            return None
+
+    def setex(self, key, ttl, value):
+        if not self._available():
+            return
+        try:
+            self._client.setex(key, ttl, value)
+            self._healthy = True
+        except redis.exceptions.RedisError:
+            self._trip()
+
+    def get_many(self, keys):
+        if not self._available():
+            return [None] * len(keys)
+        try:
+            pipe = self._client.pipeline()
+            for key in keys:
+                pipe.get(key)
+            values = pipe.execute()
+            self._healthy = True
+            return values
+        except redis.exceptions.RedisError:
+            self._trip()
+            return [None] * len(keys)
+
+    def setex_many(self, items, ttl):
+        if not self._available():
+            return
+        try:
+            pipe = self._client.pipeline()
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            pipe.execute()
+            self._healthy = True
+        except redis.exceptions.RedisError:
+            self._trip()
+
+    def delete_matching(self, patterns):
+        if not self._available():
+            return
+        try:
+            pipe = self._client.pipeline()
+            for pattern in patterns:
+                for key in self._client.scan_iter(match=pattern):
+                    pipe.delete(key)
+            pipe.execute()
+            self._healthy = True
+        except redis.exceptions.RedisError:
+            self._trip()
+
 # Initialize Redis
 try:
     redis_client = redis.Redis(
         host=os.getenv('REDIS_HOST', 'localhost'),
         port=int(os.getenv('REDIS_PORT', 6379)),
-        decode_responses=True
+        decode_responses=False,
+        socket_connect_timeout=0.2,
+        socket_timeout=0.2
     )
-    redis_available = True
 except:
     print("Warning: Redis not available. Running without caching.")
-    redis_available = False
+    redis_client = None
+
+redis_gate = RedisGate(redis_client)
 
 # Initialize database and data fetcher
 db = Database()
 data_fetcher = DataFetcher()
 
-def cache_key(endpoint: str, **params) -> str:
-    """Generate a cache key for Redis."""
-    return f"index:{endpoint}:{json.dumps(params, sort_keys=True)}"
+# Endpoint schemas are fixed, so plain f-strings build the Redis keys
+# without a json.dumps allocation per request
+
+def _perf_key(start_date: str, end_date: str) -> str:
+    return f"index:performance:{start_date}:{end_date}"
+
+def _composition_key(date: str) -> str:
+    return f"index:composition:{date}"
+
+def _changes_key(start_date: str, end_date: str) -> str:
+    return f"index:changes:{start_date}:{end_date}"
+
+def _compress(payload: bytes) -> bytes:
+    """Compress a JSON payload for Redis.
+
+    The record lists repeat the same keys per row, so even fast zlib
+    shrinks them several-fold — less Redis memory and fewer bytes per
+    cache hit on the wire.
+    """
+    return zlib.compress(payload, 1)
+
+def _decompress(cached: bytes) -> bytes:
+    try:
+        return zlib.decompress(cached)
+    except zlib.error:
+        # Entry written before compression was introduced
+        return cached
+
+def _invalidate_index_cache():
+    """Drop cached endpoint payloads after the index is rebuilt.
+
+    Deleting the whole prefix is coarse but correct: a rebuilt range can
+    overlap any cached window, and a cold read costs far less than
+    serving up to an hour of stale data off the TTL.
+    """
+    redis_gate.delete_matching(
+        ("index:performance:*", "index:composition:*", "index:changes:*"))
+
+def _cached_response(cache_id: str, request: Request, fn, *args) -> Response:
+    """Serve an endpoint's JSON straight from the cached bytes.
+
+    The cached value is already valid JSON, so a hit skips both
+    orjson.loads and FastAPI's re-encoding on the way out; a miss
+    serializes once and stores the same bytes it returns. An ETag over
+    the body lets repeat clients skip the transfer entirely with a 304.
+    """
+    cached = redis_gate.get(cache_id)
+    if cached:
+        body = _decompress(cached)
+    else:
+        body = orjson.dumps(fn(*args))
+        redis_gate.setex(cache_id, 3600, _compress(body))  # Cache for 1 hour
+    
+    etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304)
+    return Response(content=body, media_type="application/json",
+                    headers={'ETag': etag, 'Cache-Control': 'max-age=30'})
 
 async def fetch_and_store_data(start_date: str, end_date: str):
     """Background task to fetch and store market data."""
     data = await data_fetcher.fetch_all_data(start_date, end_date)
     merged_data = data_fetcher.merge_data_sources(data)
-    db.insert_market_data(merged_data)
+    await db.insert_market_data_async(merged_data)
 
 @app.post("/build-index")
 async def build_index(
@@ -62,11 +211,12 @@ async def build_index(
         print(f"Force refresh: {force_refresh}")
         
         try:
-            # Try to get any existing data for the date range
+            # LIMIT 1 existence probe instead of pulling the full
+            # performance rowset just to test emptiness
             print("Checking for existing data...")
-            test_data = db.get_performance(start_date, end_date)
+            has_data = await asyncio.to_thread(db.has_data, start_date, end_date)
             
-            if not test_data or force_refresh:
+            if not has_data or force_refresh:
                 print("No existing data found or force refresh requested")
                 print("Starting data fetch from Alpha Vantage...")
                 
@@ -76,7 +226,7 @@ async def build_index(
                     print(f"Successfully fetched {len(data)} data points")
                     print("Merging and storing data...")
                     merged_data = data_fetcher.merge_data_sources(data)
-                    db.insert_market_data(merged_data)
+                    await db.insert_market_data_async(merged_data)
                     print("Data successfully stored in database")
                 else:
                     print("Error: No data was fetched from Alpha Vantage")
@@ -90,24 +240,24 @@ async def build_index(
             data = await data_fetcher.fetch_all_data(start_date, end_date)
             if data:
                 merged_data = data_fetcher.merge_data_sources(data)
-                db.insert_market_data(merged_data)
+                await db.insert_market_data_async(merged_data)
             else:
                 raise HTTPException(
                     status_code=500,
                     detail="Failed to fetch initial market data. Please try again later."
                 )
 
-        # Build the index
-        db.build_index(start_date, end_date)
+        # Build the index off the event loop — DuckDB releases the GIL,
+        # so other requests keep being served during the heavy SQL
+        await asyncio.to_thread(db.build_index, start_date, end_date)
         
-        # Track composition changes
-        current = datetime.strptime(start_date, '%Y-%m-%d')
-        end = datetime.strptime(end_date, '%Y-%m-%d')
-        while current <= end:
-            db.track_composition_changes(current.strftime('%Y-%m-%d'))
-            current += timedelta(days=1)
-
-        return {"message": "Index built successfully"}
+        # Composition tracking doesn't gate the response: queue the
+        # set-based range statement — and the cache invalidation that
+        # must follow it — to run once the response has been sent
+        background_tasks.add_task(db.track_composition_changes_range, start_date, end_date)
+        background_tasks.add_task(_invalidate_index_cache)
+
+        return {"message": "Index built successfully; composition tracking queued"}
     except HTTPException as he:
         raise he
     except Exception as e:
@@ -117,93 +267,122 @@ async def build_index(
             detail=f"Failed to build index: {str(e)}"
         )
 
+# Plain def handlers: Starlette runs them in its threadpool, so the
+# synchronous Redis/DuckDB work inside never blocks the event loop
+
 @app.get("/index-performance")
-async def get_index_performance(start_date: str, end_date: str):
+def get_index_performance(request: Request, start_date: str, end_date: str):
     """Get index performance for a date range."""
-    cache_id = cache_key("performance", start_date=start_date, end_date=end_date)
-    
-    # Try to get from cache if Redis is available
-    if redis_available:
-        try:
-            cached = redis_client.get(cache_id)
-            if cached:
-                return json.loads(cached)
-        except:
-            pass
-    
-    # Get from database
-    performance = db.get_performance(start_date, end_date)
-    
-    # Cache the result if Redis is available
-    if redis_available:
-        try:
-            redis_client.setex(cache_id, 3600, json.dumps(performance))  # Cache for 1 hour
-        except:
-            pass
-    
-    return performance
+    return _cached_response(_perf_key(start_date, end_date), request,
+                            db.get_performance, start_date, end_date)
 
 @app.get("/index-composition")
-async def get_index_composition(date: str):
+def get_index_composition(request: Request, date: str):
     """Get index composition for a specific date."""
-    cache_id = cache_key("composition", date=date)
-    
-    # Try to get from cache
-    cached = redis_client.get(cache_id)
-    if cached:
-        return json.loads(cached)
-    
-    # Get from database
-    composition = db.get_composition(date)
-    
-    # Cache the result
-    redis_client.setex(cache_id, 3600, json.dumps(composition))
-    
-    return composition
+    return _cached_response(_composition_key(date), request,
+                            db.get_composition, date)
 
 @app.get("/composition-changes")
-async def get_composition_changes(start_date: str, end_date: str):
+def get_composition_changes(request: Request, start_date: str, end_date: str):
     """Get composition changes for a date range."""
-    cache_id = cache_key("changes", start_date=start_date, end_date=end_date)
-    
-    # Try to get from cache
-    cached = redis_client.get(cache_id)
-    if cached:
-        return json.loads(cached)
-    
-    # Get from database
-    changes = db.get_composition_changes(start_date, end_date)
-    
-    # Cache the result
-    redis_client.setex(cache_id, 3600, json.dumps(changes))
-    
-    return changes
+    return _cached_response(_changes_key(start_date, end_date), request,
+                            db.get_composition_changes, start_date, end_date)
 
 @app.post("/export-data")
-async def export_data(start_date: str, end_date: str):
-    """Export index data to Excel."""
+async def export_data(start_date: str, end_date: str, format: str = "xlsx"):
+    """Export index data to Excel, CSV, or Parquet."""
+    if format not in ("xlsx", "csv", "parquet"):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported export format: {format}"
+        )
+
     # Create a temporary directory if it doesn't exist
     export_dir = Path("temp_exports")
     export_dir.mkdir(exist_ok=True)
     
-    # Generate Excel file
-    excel_path = export_dir / f"index_data_{start_date}_to_{end_date}.xlsx"
+    # One pipelined round trip covers all three cache reads (and one
+    # more the writes for whatever missed), reusing the keys the GET
+    # endpoints populate
+    cache_ids = (
+        _perf_key(start_date, end_date),
+        _composition_key(end_date),
+        _changes_key(start_date, end_date),
+    )
+    cached_payloads = redis_gate.get_many(cache_ids)
+    
+    if all(cached_payloads):
+        tables = [orjson.loads(_decompress(payload)) for payload in cached_payloads]
+    else:
+        # Any miss costs one fused DB call that fills all three tables
+        # in a single connection round trip
+        bundle = await asyncio.to_thread(db.get_export_bundle, start_date, end_date)
+        fresh = (bundle['performance'], bundle['composition'], bundle['changes'])
+        tables = []
+        missed = {}
+        for cache_id, payload, result in zip(cache_ids, cached_payloads, fresh):
+            if payload:
+                tables.append(orjson.loads(_decompress(payload)))
+            else:
+                tables.append(result)
+                missed[cache_id] = _compress(orjson.dumps(result))
+        redis_gate.setex_many(missed, 3600)  # Cache for 1 hour
     
-    with pd.ExcelWriter(excel_path) as writer:
-        # Export performance data
-        performance = pd.DataFrame(db.get_performance(start_date, end_date))
-        performance.to_excel(writer, sheet_name='Performance', index=False)
+    sheets = (
+        ('Performance', ('date', 'daily_return', 'cumulative_return'), tables[0]),
+        ('Latest Composition', ('symbol', 'weight', 'price', 'market_cap'), tables[1]),
+        ('Composition Changes', ('date', 'symbol', 'change_type'), tables[2]),
+    )
+
+    if format == "xlsx":
+        # Generate Excel file
+        excel_path = export_dir / f"index_data_{start_date}_to_{end_date}.xlsx"
+        
+        # A write-only workbook streams the raw rows straight to the XML
+        # serializer — no intermediate DataFrame, so each row is touched
+        # once and peak memory stays at one row
+        def _write_workbook():
+            workbook = openpyxl.Workbook(write_only=True)
+            for sheet_name, header, rows in sheets:
+                worksheet = workbook.create_sheet(sheet_name)
+                worksheet.append(list(header))
+                for row in rows:
+                    worksheet.append(row)
+            workbook.save(excel_path)
         
-        # Export composition data
-        composition = pd.DataFrame(db.get_composition(end_date))
-        composition.to_excel(writer, sheet_name='Latest Composition', index=False)
+        # XLSX serialization is CPU-bound; run it off the event loop so
+        # concurrent requests keep being served while the file builds
+        await asyncio.to_thread(_write_workbook)
         
-        # Export changes data
-        changes = pd.DataFrame(db.get_composition_changes(start_date, end_date))
-        changes.to_excel(writer, sheet_name='Composition Changes', index=False)
+        return FileResponse(
+            path=excel_path,
+            filename=excel_path.name,
+            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+
+    # CSV and Parquet serialize an order of magnitude faster than xlsx;
+    # the three tables go into one archive so the response stays a
+    # single file. Parquet is already zstd-compressed, so it is stored
+    # rather than deflated again.
+    archive_path = export_dir / f"index_data_{start_date}_to_{end_date}_{format}.zip"
+    compression = zipfile.ZIP_DEFLATED if format == "csv" else zipfile.ZIP_STORED
+    
+    def _write_archive():
+        with zipfile.ZipFile(archive_path, "w", compression) as archive:
+            for sheet_name, header, rows in sheets:
+                stem = sheet_name.lower().replace(" ", "_")
+                df = pd.DataFrame(rows, columns=list(header))
+                if format == "csv":
+                    archive.writestr(f"{stem}.csv", df.to_csv(index=False))
+                else:
+                    buffer = io.BytesIO()
+                    df.to_parquet(buffer, compression="zstd")
+                    archive.writestr(f"{stem}.parquet", buffer.getvalue())
+    
+    await asyncio.to_thread(_write_archive)
     
     return FileResponse(
-        path=excel_path,
-        filename=excel_path.name,
-        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        path=archive_path,
+        filename=archive_path.name,
+        media_type="application/zip"
     )
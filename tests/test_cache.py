@@ -0,0 +1,154 @@
+import os
+from datetime import datetime
+
+import duckdb
+import pytest
+
+from backup.cache import CacheConfig, DataCache
+
+
+def _make_cache(db_path):
+    # Redis is only contacted lazily on the first command, so the cache
+    # can be constructed without a server for DuckDB-only tests
+    return DataCache(CacheConfig(
+        redis_host="nohost",
+        redis_port=6379,
+        redis_db=0,
+        duckdb_path=str(db_path),
+        market_cap_ttl=3600,
+        price_ttl=3600,
+    ))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    dc = _make_cache(tmp_path / "test_cache.db")
+    yield dc
+    dc.db.close()
+
+
+def _row(symbol, date, price, volume=100, market_cap=1e9, source="test"):
+    return {
+        "symbol": symbol,
+        "date": date,
+        "price": price,
+        "volume": volume,
+        "market_cap": market_cap,
+        "source": source,
+        "is_estimated": False,
+    }
+
+
+def test_save_and_read_back(cache):
+    # One batch spanning two months exercises both partition writes
+    cache.save_daily_data([
+        _row("AAPL", "2024-01-02", 190.0),
+        _row("AAPL", "2024-02-01", 195.0),
+        _row("MSFT", "2024-01-02", 370.0),
+    ])
+
+    df = cache.get_cached_daily_data(
+        "AAPL", datetime(2024, 1, 1), datetime(2024, 2, 28))
+    assert list(df["price"]) == [190.0, 195.0]
+
+    rows = cache.get_cached_daily_rows(
+        "MSFT", datetime(2024, 1, 1), datetime(2024, 1, 31))
+    assert len(rows) == 1
+    assert rows[0][0] == "MSFT"
+
+
+def test_save_overwrites_on_symbol_and_date(cache):
+    # A re-save of the same (symbol, date) replaces the row, matching the
+    # old INSERT OR REPLACE semantics
+    cache.save_daily_data([_row("AAPL", "2024-01-02", 190.0)])
+    cache.save_daily_data([_row("AAPL", "2024-01-02", 191.5)])
+
+    df = cache.get_cached_daily_data(
+        "AAPL", datetime(2024, 1, 1), datetime(2024, 1, 31))
+    assert list(df["price"]) == [191.5]
+
+
+def test_legacy_table_migration(tmp_path):
+    # A database holding the pre-Parquet market_data table migrates into
+    # partitions on construction and stays readable
+    path = tmp_path / "legacy.db"
+    conn = duckdb.connect(str(path))
+    conn.execute("""
+        CREATE TABLE market_data (
+            symbol VARCHAR, date DATE, price DOUBLE, volume BIGINT,
+            market_cap DOUBLE, source VARCHAR, is_estimated BOOLEAN,
+            timestamp TIMESTAMP, PRIMARY KEY (symbol, date)
+        )
+    """)
+    conn.execute("""
+        INSERT INTO market_data
+        VALUES ('AAPL', DATE '2024-01-02', 190.0, 100, 1e9, 'legacy', FALSE, now())
+    """)
+    conn.close()
+
+    dc = _make_cache(path)
+    try:
+        rows = dc.get_cached_daily_rows(
+            "AAPL", datetime(2024, 1, 1), datetime(2024, 1, 31))
+        assert len(rows) == 1
+        # The legacy base table is gone; market_data is now the view
+        assert dc.db.execute("""
+            SELECT 1 FROM information_schema.tables
+            WHERE table_name = 'market_data' AND table_type = 'BASE TABLE'
+        """).fetchone() is None
+    finally:
+        dc.db.close()
+
+
+def test_quality_flush_upserts(cache):
+    # Same key logged twice in one batch, then re-logged later: one row
+    # survives, carrying the latest confidence score
+    d = datetime(2024, 1, 2)
+    cache.log_data_quality("AAPL", d, "price", "test", False, 0.5)
+    cache.log_data_quality("AAPL", d, "price", "test", False, 0.7)
+    cache.flush_quality()
+    cache.log_data_quality("AAPL", d, "price", "test", True, 0.9)
+    cache.flush_quality()
+
+    rows = cache.db.execute(
+        "SELECT is_estimated, confidence_score FROM data_quality").fetchall()
+    assert rows == [(True, 0.9)]
+
+
+def test_batch_flushes_quality_once(cache):
+    # batch() exits through flush_quality + commit without raising
+    with cache.batch() as c:
+        c.save_daily_data([_row("AAPL", "2024-01-02", 190.0)])
+        c.log_data_quality("AAPL", datetime(2024, 1, 2), "price", "test", False, 1.0)
+    assert cache._dq_buffer == []
+    count = cache.db.execute("SELECT count(*) FROM data_quality").fetchone()[0]
+    assert count == 1
+
+
+def test_idempotent_save_skips_rewrite(cache, tmp_path):
+    # Re-ingesting identical rows must not rewrite the month's file; a
+    # changed price must
+    batch = [_row("AAPL", "2024-01-02", 190.0)]
+    cache.save_daily_data(batch)
+    part = str(tmp_path / "md" / "month=2024-01" / "part.parquet")
+    assert os.path.exists(part)
+    before = os.stat(part).st_mtime_ns
+
+    cache.save_daily_data(batch)
+    assert os.stat(part).st_mtime_ns == before
+
+    cache.save_daily_data([_row("AAPL", "2024-01-02", 191.0)])
+    assert os.stat(part).st_mtime_ns != before
+
+
+def test_multi_symbol_read(cache):
+    cache.save_daily_data([
+        _row("AAPL", "2024-01-02", 190.0),
+        _row("AAPL", "2024-01-03", 191.0),
+        _row("MSFT", "2024-01-02", 370.0),
+    ])
+    result = cache.get_cached_daily_data_multi(
+        ["AAPL", "MSFT"], datetime(2024, 1, 1), datetime(2024, 1, 31))
+    assert set(result) == {"AAPL", "MSFT"}
+    assert list(result["AAPL"]["price"]) == [190.0, 191.0]
+    assert list(result["MSFT"]["price"]) == [370.0]